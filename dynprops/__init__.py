@@ -1 +1,9 @@
 from dynprops._dynprops import *
+from dynprops._export import *
+from dynprops._sinks import *
+from dynprops._views import *
+from dynprops._router import *
+from dynprops._sort import *
+from dynprops._serialize import *
+from dynprops._stats import *
+from dynprops._pool import *
@@ -1,8 +1,12 @@
 import csv
 import io
-from collections import OrderedDict
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
 from inspect import signature
-from typing import Dict, Any, Optional, Union, Callable, Tuple, List
+from typing import Dict, Any, Optional, Union, Callable, Tuple, List, Iterator, Iterable
 
 # A dynamic entry value can be:
 #   1) A function:      f() -> object
@@ -17,6 +21,13 @@ warn_mode = True
 
 dynprops_dialect = 'DynProps'
 
+# Global values overridden in the current context (thread or asyncio task): declaring class -> {name: value}.
+# None (no active scope) keeps Global reads on the class level fast path
+_global_scopes = ContextVar('dynprops_global_scopes', default=None)
+
+# Per thread row formatting buffer and its csv writers, one per dialect
+_formatting = threading.local()
+
 
 def _register_dynprops_dialect(sep: Optional[str]=None) -> None:
     if sep is None:
@@ -42,6 +53,10 @@ class DynEntry:
         self.default_value = default_value
 
 
+# A row filter.  Predicates are given the instance itself, so only the properties they actually read get reified
+RowPredicate = Callable[["DynProps"], bool]
+
+
 # Property name and associated property
 # key parents_key - insert parent elements here
 #     ordered_dict_token - ignore - used to fix an issue in OrderedDict
@@ -113,7 +128,7 @@ class DynPropsMeta(type):
     @_separator.setter
     def _separator(cls, sep):
         _register_dynprops_dialect(sep)
-        cls._csv_writer = csv.writer(cls._io_stream, dialect=dynprops_dialect)
+        cls._csv_dialect = csv.get_dialect(dynprops_dialect)
 
     def _xfer_annotations(cls, kwargs: Dict) -> None:
         """ Create the DynEntries list from the type (and possibly) values """
@@ -166,7 +181,11 @@ class DynPropsMeta(type):
 
     def __getattr__(self, item):
         if item in self._props:
-            att = super().__getattribute__('_' + item)
+            scopes = _global_scopes.get()
+            if scopes is not None and item in scopes.get(self, ()):
+                att = scopes[self][item]
+            else:
+                att = super().__getattribute__('_' + item)
             att_parms = list(signature(att).parameters) if callable(att) else []
             return att(self) if len(att_parms) == 1 and 'self' in att_parms else att() \
                 if callable(att) else att.reify() if getattr(att, 'reify', None) else att
@@ -180,34 +199,144 @@ class DynProps(metaclass=DynPropsMeta):
     _sql_string_delimiter_escape: str = r'\"'    # Change to double quote for Oracle
     _sql_null_text: str = ""                     # Null value representation
 
-    _io_stream = io.StringIO()
-    # noinspection PyTypeChecker
     _register_dynprops_dialect()
-    _csv_writer = csv.writer(_io_stream, dialect=dynprops_dialect)
+    _csv_dialect = csv.get_dialect(dynprops_dialect)   # Rows are formatted in the per thread _formatting buffer
 
     _props: DynEntries = OrderedDict()          # Names of represented elements
     _keys: List[str] = []
     _dyn_parent: Optional["DynProps"] = None    # Parent
+    _record_fields: Optional[Dict[str, Any]] = None     # Local to source record field map for record_view
+    _view_of: Optional[DynPropsMeta] = None     # Class viewed by a record_view class
+    _schema_version: Optional[int] = None       # Explicit pickle schema version (see _pickle_version)
+    _pickle_reified: bool = False               # Pickle reified Local values rather than callables
 
     @classmethod
-    def _head(cls) -> str:
+    def _head(cls, columns: Optional[List[str]]=None) -> str:
         """ Return a tsv/csv header """
-        cls._io_stream.seek(0)
-        cls._io_stream.truncate(0)
-        cls._csv_writer.writerow(cls._keys)
-        return cls._io_stream.getvalue()
+        return cls._delimit(cls._keys if columns is None else columns)
 
-    def _freeze(self) -> Dict[str, object]:
+    @classmethod
+    def _check_columns(cls, columns: Optional[List[str]]) -> None:
+        """ Make sure that all columns in a projection are properties of cls """
+        if columns is not None:
+            for c in columns:
+                if c not in cls._keys:
+                    raise ValueError(f"{c} is not a property of {cls.__name__}")
+
+    @classmethod
+    def _delimit(cls, values: Iterable[object]) -> str:
+        """ Return the delimited representation of a sequence of values """
+        try:
+            stream, writers = _formatting.stream, _formatting.writers
+        except AttributeError:
+            stream = _formatting.stream = io.StringIO()
+            writers = _formatting.writers = {}
+        writer = writers.get(cls._csv_dialect)
+        if writer is None:
+            writer = writers[cls._csv_dialect] = csv.writer(stream, dialect=cls._csv_dialect)
+        stream.seek(0)
+        stream.truncate(0)
+        writer.writerow(values)
+        return stream.getvalue()
+
+    def _freeze(self, columns: Optional[List[str]]=None) -> Dict[str, object]:
         """ Return an ordered dictionary of key/value tuples
 
         :return: OrderedDict
         """
-        rval = OrderedDict()
-        for k in self._keys:
+        return OrderedDict(zip(self._keys if columns is None else columns, self._values(columns)))
+
+    def _values(self, columns: Optional[List[str]]=None) -> Iterator[object]:
+        """ Return an iterator over the reified property values in key (or columns) order """
+        for k in (self._keys if columns is None else columns):
             v = self.__getattr__(k)
-            rval[k] = v.reify() if getattr(v, 'reify', None) else v
+            yield v.reify() if getattr(v, 'reify', None) else v
+
+    @classmethod
+    def _record_type(cls) -> type:
+        """ Return the (cached) namedtuple type whose fields are the keys of cls """
+        if cls._view_of is not None:
+            return cls._view_of._record_type()
+        rval = cls.__dict__.get('_record_tuple')
+        if rval is None:
+            rval = namedtuple(cls.__name__ + 'Record', cls._keys, rename=True)
+            cls._record_tuple = rval
+        return rval
+
+    @classmethod
+    def _local_keys(cls) -> List[str]:
+        """ Return the (cached) list of the Local properties of cls in key order """
+        rval = cls.__dict__.get('_local_key_list')
+        if rval is None:
+            rval = [k for k in cls._keys if not cls._get_prop(k).is_global]
+            cls._local_key_list = rval
         return rval
 
+    @classmethod
+    def _pickle_version(cls) -> int:
+        """ Return the schema version that pickled instances of cls are tagged with
+
+        This is the _schema_version set on cls itself if there is one.  Otherwise it is a (cached) fingerprint of the
+        names and order of the Local properties of cls, so adding, removing or reordering a Local changes it.
+        """
+        rval = cls.__dict__.get('_schema_version')
+        if rval is None:
+            rval = cls.__dict__.get('_schema_fingerprint')
+            if rval is None:
+                rval = zlib.crc32('\t'.join(cls._local_keys()).encode())
+                cls._schema_fingerprint = rval
+        return rval
+
+    def _pickle_state(self, reify: bool=False) -> Tuple[int, Tuple, Optional[Dict[str, object]]]:
+        """ Return the Local values set on this instance and any other instance attributes
+
+        :param reify: True means return the reified value of the Locals that are set rather than what was set
+        :return: bit mask of the positions in _local_keys that are set, their values in order, and a dictionary
+        of the other instance attributes (None if there aren't any)
+        """
+        state = self.__dict__
+        mask = 0
+        values = []
+        for i, k in enumerate(self._local_keys()):
+            if '_' + k in state:
+                mask |= 1 << i
+                if reify:
+                    v = getattr(self, k)
+                    values.append(v.reify() if getattr(v, 'reify', None) else v)
+                else:
+                    values.append(state['_' + k])
+        others = None
+        if len(state) > len(values):
+            local_keys = self._local_keys()
+            others = {k: v for k, v in state.items() if not (k.startswith('_') and k[1:] in local_keys)}
+        return mask, tuple(values), others
+
+    def _load_pickle_state(self, schema_version: int, mask: int, values: Tuple,
+                           others: Optional[Dict[str, object]]=None) -> None:
+        """ Restore the state returned by _pickle_state """
+        local_keys = self._local_keys()
+        if schema_version != self._pickle_version() or mask >> len(local_keys):
+            raise ValueError(f"Pickled {self.__class__.__name__} (schema version {schema_version}) does not match "
+                             f"schema version {self._pickle_version()}")
+        state = self.__dict__
+        values = iter(values)
+        for i, k in enumerate(local_keys):
+            if mask & (1 << i):
+                state['_' + k] = next(values)
+        if others:
+            state.update(others)
+
+    def _materialize(self) -> "DynProps":
+        """ Return an ordinary instance of the class with the state of self.  Overridden by record views """
+        return self
+
+    def __getstate__(self) -> Tuple:
+        """ Pickle the schema version and the Locals set on the instance by position """
+        return (self._pickle_version(), ) + self._pickle_state(self._pickle_reified)
+
+    def __setstate__(self, state: Tuple) -> None:
+        self._load_pickle_state(*state)
+
     @classmethod
     def _clear(cls) -> None:
         """ Reset all properties back to their null (None) value """
@@ -216,6 +345,12 @@ class DynProps(metaclass=DynPropsMeta):
                 if v.default_value is not None or not cls._dyn_parent or k not in cls._dyn_parent._keys:
                     setattr(cls, k, v.default_value)
 
+    def _reset(self) -> None:
+        """ Remove all instance level Local settings, reverting them to the class level values """
+        state = self.__dict__
+        for k in self._local_keys():
+            state.pop('_' + k, None)
+
     # TODO: Escape the separators and any other noise (can we use SQL escape here?)
     @classmethod
     def _escape(cls, txt: str) -> str:
@@ -230,12 +365,9 @@ class DynProps(metaclass=DynPropsMeta):
         obj_val = ', '.join([f"{k}:'{v}'" for k, v in self._freeze().items()])
         return f"{self.__class__.__name__}({obj_val})"
 
-    def _delimited(self) -> str:
+    def _delimited(self, columns: Optional[List[str]]=None) -> str:
         """ Return a delimited representation of the object """
-        self._io_stream.seek(0)
-        self._io_stream.truncate(0)
-        self._csv_writer.writerow(self._freeze().values())
-        return self._io_stream.getvalue()
+        return self._delimit(self._values(columns))
 
     def __lt__(self, other: "DynProps") -> bool:
         if not isinstance(other, DynProps):
@@ -289,20 +421,100 @@ def sql_string_delimiter_esc(esc: Optional[str] = None) -> str:
     return rval
 
 
+@contextmanager
+def global_scope(cls: type(DynProps), **values) -> Iterator[None]:
+    """ Override Global property values of cls within the current context
+
+    Overrides apply to reads in the current thread or asyncio task (and tasks it subsequently creates) until the
+    with block exits.  Scopes nest, and class level values are unaffected.
+
+    :param cls: DynProps class that declares or inherits the Globals
+    :param values: Global property names and the values to use in this scope
+    """
+    scopes = dict(_global_scopes.get() or {})
+    for k, v in values.items():
+        if k not in cls._keys or not cls._get_prop(k).is_global:
+            raise ValueError(f"{k} is not a Global property of {cls.__name__}")
+        declaring_cls = cls
+        while k not in declaring_cls._props:
+            declaring_cls = declaring_cls._dyn_parent
+        scopes[declaring_cls] = dict(scopes.get(declaring_cls, {}), **{k: v})
+    token = _global_scopes.set(scopes)
+    try:
+        yield
+    finally:
+        _global_scopes.reset(token)
+
+
 def clear(cls: type(DynProps)) -> None:
     cls._clear()
 
 
-def heading(cls: type(DynProps)) -> str:
-    """ Return the tsv/csv heading for cls """
-    return cls._head()
+def reset(inst: DynProps) -> None:
+    """ Revert the Local properties of inst to their class level values """
+    inst._reset()
+
+
+def heading(cls: type(DynProps), columns: Optional[List[str]]=None) -> str:
+    """ Return the tsv/csv heading for cls, optionally limited to columns """
+    cls._check_columns(columns)
+    return cls._head(columns)
+
+
+def as_dict(inst: DynProps, columns: Optional[List[str]]=None) -> Dict[str, object]:
+    """ Return the dictionary representation of inst, optionally limited to columns """
+    inst._check_columns(columns)
+    return inst._freeze(columns)
 
 
-def as_dict(inst: DynProps) -> Dict[str, object]:
-    """ Return the dictionary representation of inst """
-    return inst._freeze()
+def row(inst: DynProps, columns: Optional[List[str]]=None) -> str:
+    """ Return the tsv/csv representation of inst, optionally limited to columns """
+    inst._check_columns(columns)
+    return inst._delimited(columns)
 
 
-def row(inst: DynProps) -> str:
-    """ Return the tsv/csv representation of inst """
-    return inst._delimited()
+def iter_values(inst: DynProps, columns: Optional[List[str]]=None) -> Iterator[object]:
+    """ Return an iterator over the property values of inst in heading (or columns) order """
+    inst._check_columns(columns)
+    return inst._values(columns)
+
+
+def as_tuple(inst: DynProps, columns: Optional[List[str]]=None) -> Tuple:
+    """ Return the property values of inst as a tuple in heading (or columns) order """
+    inst._check_columns(columns)
+    return tuple(inst._values(columns))
+
+
+def record_type(cls: type(DynProps)) -> type:
+    """ Return the namedtuple type used by as_record for cls """
+    return cls._record_type()
+
+
+def as_record(inst: DynProps) -> Tuple:
+    """ Return the property values of inst as an instance of record_type(inst.__class__) """
+    return inst._record_type()._make(inst._values())
+
+
+def as_tuples(instances: Iterable[DynProps], columns: Optional[List[str]]=None,
+              where: Optional[RowPredicate]=None) -> Iterator[Tuple]:
+    """ Return an iterator over the property value tuples of instances (e.g. for cursor.executemany)
+
+    :param instances: instances to convert
+    :param columns: properties to include.  Default is all of them
+    :param where: only include the instances for which where(inst) is true.  Evaluated before anything is reified
+    """
+    checked = set()
+    for inst in instances:
+        if where is not None and not where(inst):
+            continue
+        if columns is not None and inst.__class__ not in checked:
+            inst._check_columns(columns)
+            checked.add(inst.__class__)
+        yield tuple(inst._values(columns))
+
+
+def as_records(cls: type(DynProps), instances: Iterable[DynProps]) -> Iterator[Tuple]:
+    """ Return an iterator over instances as record_type(cls) records """
+    make = cls._record_type()._make
+    for inst in instances:
+        yield make(inst._values())
@@ -0,0 +1,426 @@
+import bz2
+import csv
+import gzip
+import io
+import json
+import lzma
+import mmap
+import os
+import pickle
+import queue
+import struct
+import threading
+from bisect import bisect_right
+from itertools import islice
+from typing import Optional, Iterable, List, Dict, BinaryIO, Callable
+
+from dynprops._dynprops import DynProps, DynPropsMeta, RowPredicate, dynprops_dialect, heading, global_scope
+from dynprops._stats import ColumnStats, stats_suffix
+
+# Sidecar file suffixes.  The offset index is a sequence of little endian unsigned 64 bit integers, one per row
+# plus a trailing end of file marker, so row n occupies bytes [offset[n], offset[n+1]) of the data file.
+# The key map is a JSON dictionary from the text of the key column to the offsets of the rows carrying it.
+index_suffix = '.idx'
+keymap_suffix = '.keys'
+
+# Checkpoint file suffix.  A checkpoint is a pickled dictionary with the number of rows written ('rows'), the number
+# of instances consumed to write them ('seen'), the length of the data file after the last of them ('offset'), the
+# Global property values they were written with ('globals'), the properties of the exported class ('keys'), the
+# columns being written ('columns') and the state of the column statistics for the rows, if any are being collected
+# ('stats')
+checkpoint_suffix = '.ckpt'
+
+_offset_format = struct.Struct('<Q')
+
+# Supported output compression methods and the file suffix each one adds
+compressors: Dict[str, Callable[[str, str], BinaryIO]] = {'gzip': gzip.open, 'bz2': bz2.open, 'lzma': lzma.open}
+compression_suffixes: Dict[str, str] = {'gzip': '.gz', 'bz2': '.bz2', 'lzma': '.xz'}
+
+
+class _BackgroundStream:
+    """ Binary stream that hands its (buffered) output to a worker thread
+
+    Used to move compression off the thread that is reifying rows.  zlib, bz2 and lzma release the GIL while
+    compressing, so the two overlap.
+    """
+    chunk_size = 1 << 16
+    queue_depth = 16
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._queue = queue.Queue(self.queue_depth)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> None:
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._error is None:
+                try:
+                    self._stream.write(chunk)
+                except BaseException as e:
+                    self._error = e
+            self._queue.task_done()
+
+    def _flush(self) -> None:
+        if self._error is not None:
+            raise self._error
+        if self._buffer:
+            self._queue.put(b''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+
+    def flush(self) -> None:
+        """ Wait until everything written so far has been passed to the underlying stream and flush it """
+        self._flush()
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+        self._stream.flush()
+
+    def fileno(self) -> int:
+        return self._stream.fileno()
+
+    def write(self, data: bytes) -> int:
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.chunk_size:
+            self._flush()
+        return len(data)
+
+    def close(self) -> None:
+        try:
+            self._flush()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+            self._stream.close()
+        if self._error is not None:
+            raise self._error
+
+
+def open_output(path: str, compression: Optional[str]=None, background: bool=False) -> BinaryIO:
+    """ Open path for binary output
+
+    :param path: file name
+    :param compression: None or one of the keys in compressors
+    :param background: True means do the writing (and compressing) in a separate thread
+    :return: writable binary stream
+    """
+    if compression is not None and compression not in compressors:
+        raise ValueError(f"Unknown compression: {compression}")
+    stream = compressors[compression](path, 'wb') if compression else open(path, 'wb')
+    return _BackgroundStream(stream) if background else stream
+
+
+class RowWriter:
+    def __init__(self, cls: DynPropsMeta, path: str, index: bool=False, key: Optional[str]=None,
+                 compression: Optional[str]=None, background: bool=False, checkpoint_every: Optional[int]=None,
+                 resume: bool=False, stats: Optional[ColumnStats]=None, columns: Optional[List[str]]=None,
+                 where: Optional[RowPredicate]=None) -> None:
+        """ Bulk writer for the delimited representation of instances of cls
+
+        :param cls: DynProps class being exported.  A heading line is written before the first row
+        :param path: name of the output file
+        :param index: True means write a byte offset index (path + index_suffix) alongside the data
+        :param key: name of an output column to build a key to offset map (path + keymap_suffix) for
+        :param compression: compress the output with one of the methods in compressors
+        :param background: True means compress and write the output in a separate thread
+        :param checkpoint_every: write a checkpoint (path + checkpoint_suffix) every checkpoint_every instances
+        :param resume: True means continue from the checkpoint of an earlier, unfinished, run if there is one.
+        The output is truncated to the checkpoint, and nrows, nseen and resumed_globals are set from it.  A
+        checkpoint that doesn't match cls or the output file is rejected with a ValueError, as is one without
+        statistics if stats is given.  The statistics of a resumed run continue from the checkpoint.  False means start
+        over, removing any existing checkpoint
+        :param stats: collector to add the values of each row to
+        :param columns: properties to write.  Default is all of them
+        :param where: only write the instances for which where(inst) is true.  Evaluated before anything is reified
+        """
+        cls._check_columns(columns)
+        if key is not None and key not in (cls._keys if columns is None else columns):
+            raise ValueError(f"{key} is not an output column of {cls.__name__}")
+        if compression is not None and (index or key is not None):
+            raise ValueError("Compressed output cannot be indexed")
+        if (checkpoint_every is not None or resume) and (compression is not None or key is not None):
+            raise ValueError("Compressed or key mapped output cannot be checkpointed")
+        self.cls = cls
+        self.path = path
+        self.columns = columns
+        self.where = where
+        self.nrows = 0
+        self.nseen = 0
+        self.checkpoint_every = checkpoint_every
+        self.resumed_globals: Optional[Dict[str, object]] = None
+        self.stats = stats
+        self._key = key
+        self._key_pos = (cls._keys if columns is None else columns).index(key) if key is not None else None
+        self._keymap: Dict[str, List[int]] = {}
+        self._offset = 0
+        if not resume and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        checkpoint = self._read_checkpoint() if resume else None
+        if checkpoint is None:
+            self._stream: BinaryIO = open_output(path, compression, background)
+            self._index: Optional[BinaryIO] = open(path + index_suffix, 'wb') if index or key is not None else None
+            self._write_line(heading(cls, columns))
+        else:
+            self._check_checkpoint(checkpoint)
+            if stats is not None:
+                if checkpoint.get('stats') is None:
+                    raise ValueError(f"{self.checkpoint_path} has no column statistics to resume")
+                stats._load_state(checkpoint['stats'])
+            self.nrows = checkpoint['rows']
+            self.nseen = checkpoint.get('seen', self.nrows)
+            self._offset = checkpoint['offset']
+            self.resumed_globals = checkpoint['globals']
+            self._stream = self._truncated(path, self._offset)
+            self._index = self._truncated(path + index_suffix, self.nrows * _offset_format.size) if index else None
+            if background:
+                self._stream = _BackgroundStream(self._stream)
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.path + checkpoint_suffix
+
+    @staticmethod
+    def _truncated(path: str, size: int) -> BinaryIO:
+        """ Open path for appending after its first size bytes """
+        stream = open(path, 'r+b')
+        if stream.seek(0, os.SEEK_END) < size:
+            stream.close()
+            raise ValueError(f"{path} is shorter than its checkpoint")
+        stream.truncate(size)
+        stream.seek(size)
+        return stream
+
+    def _read_checkpoint(self) -> Optional[Dict[str, object]]:
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+
+    @property
+    def _output_columns(self) -> List[str]:
+        return list(self.cls._keys if self.columns is None else self.columns)
+
+    def _check_checkpoint(self, checkpoint: Dict[str, object]) -> None:
+        """ Make sure that checkpoint was written by an export of the same class to the current output file """
+        if checkpoint.get('keys') != self.cls._keys:
+            raise ValueError(f"{self.checkpoint_path} was not written by an export of {self.cls.__name__}")
+        if checkpoint.get('columns') != self._output_columns:
+            raise ValueError(f"{self.checkpoint_path} was written with columns {checkpoint.get('columns')}, "
+                             f"not {self._output_columns}")
+        head = (heading(self.cls, self.columns) + '\n').encode()
+        with open(self.path, 'rb') as f:
+            if f.read(len(head)) != head:
+                raise ValueError(f"{self.path} does not start with the heading of {self.cls.__name__}")
+
+    def checkpoint(self) -> None:
+        """ Make the rows written so far durable and record them and the Global values in effect """
+        for stream in (self._stream, self._index):
+            if stream is not None:
+                stream.flush()
+                os.fsync(stream.fileno())
+        cls_globals = {k: getattr(self.cls, k) for k in self.cls._keys if self.cls._get_prop(k).is_global}
+        checkpoint = dict(rows=self.nrows, seen=self.nseen, offset=self._offset, globals=cls_globals,
+                          keys=self.cls._keys, columns=self._output_columns,
+                          stats=self.stats._state() if self.stats is not None else None)
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @property
+    def nbytes(self) -> int:
+        """ Number of (uncompressed) bytes written so far, heading included """
+        return self._offset
+
+    def _write_line(self, line: str) -> None:
+        data = (line + '\n').encode()
+        self._stream.write(data)
+        self._offset += len(data)
+
+    def write(self, inst: DynProps) -> bool:
+        """ Append the delimited representation of inst to the output if it passes the where filter
+
+        :return: True if inst was written
+        """
+        self.nseen += 1
+        written = self._write(inst)
+        if self.checkpoint_every is not None and self.nseen % self.checkpoint_every == 0:
+            self.checkpoint()
+        return written
+
+    def _write(self, inst: DynProps) -> bool:
+        if self.where is not None and not self.where(inst):
+            return False
+        values = tuple(inst._values(self.columns))
+        if self._index is not None:
+            self._index.write(_offset_format.pack(self._offset))
+        if self._key is not None:
+            key = values[self._key_pos]
+            self._keymap.setdefault('' if key is None else str(key), []).append(self._offset)
+        if self.stats is not None:
+            self.stats.add(values)
+        self._write_line(inst._delimit(values))
+        self.nrows += 1
+        return True
+
+    def close(self) -> None:
+        """ Close the output, finishing the sidecar files if any and removing the checkpoint """
+        self._close()
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def _close(self) -> None:
+        if self._index is not None:
+            self._index.write(_offset_format.pack(self._offset))
+            self._index.close()
+            self._index = None
+        if self._key is not None:
+            with open(self.path + keymap_suffix, 'w') as keyfile:
+                json.dump(self._keymap, keyfile)
+            self._key = None
+        self._stream.close()
+
+    def __enter__(self) -> "RowWriter":
+        return self
+
+    def __exit__(self, exc_type, *_) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # Leave the last checkpoint in place for a resumed run
+            self._close()
+
+
+class IndexedRows:
+    def __init__(self, cls: DynPropsMeta, path: str, columns: Optional[List[str]]=None) -> None:
+        """ Random access to a file written by RowWriter with an index
+
+        :param cls: DynProps class that was exported
+        :param path: name of the data file.  path + index_suffix must exist, path + keymap_suffix is optional
+        :param columns: the columns that were exported, if not all of them
+        """
+        self.cls = cls
+        self.columns = columns
+        self._datafile = open(path, 'rb')
+        self._indexfile = open(path + index_suffix, 'rb')
+        self._data = mmap.mmap(self._datafile.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = mmap.mmap(self._indexfile.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            with open(path + keymap_suffix) as keyfile:
+                self._keymap: Optional[Dict[str, List[int]]] = json.load(keyfile)
+        except FileNotFoundError:
+            self._keymap = None
+
+    def _offset(self, n: int) -> int:
+        return _offset_format.unpack_from(self._index, n * _offset_format.size)[0]
+
+    def __len__(self) -> int:
+        return len(self._index) // _offset_format.size - 1
+
+    def _load(self, start: int, end: int) -> DynProps:
+        return load_row(self.cls, self._data[start:end - 1].decode(), self.columns)
+
+    def __getitem__(self, n: int) -> DynProps:
+        """ Return row n of the file as an instance of cls """
+        nrows = len(self)
+        if n < 0:
+            n += nrows
+        if not 0 <= n < nrows:
+            raise IndexError("row index out of range")
+        return self._load(self._offset(n), self._offset(n + 1))
+
+    def get(self, key: str) -> List[DynProps]:
+        """ Return all rows whose key column text is key """
+        if self._keymap is None:
+            raise ValueError("No key map was written for this file")
+        offsets = _Offsets(self)
+        rval = []
+        for start in self._keymap.get(key, []):
+            rval.append(self._load(start, offsets[bisect_right(offsets, start)]))
+        return rval
+
+    def close(self) -> None:
+        self._data.close()
+        self._index.close()
+        self._datafile.close()
+        self._indexfile.close()
+
+    def __enter__(self) -> "IndexedRows":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class _Offsets:
+    """ Sequence view of the offset index for bisection """
+    def __init__(self, rows: IndexedRows) -> None:
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows) + 1
+
+    def __getitem__(self, n: int) -> int:
+        return self._rows._offset(n)
+
+
+def load_row(cls: DynPropsMeta, text: str, columns: Optional[List[str]]=None) -> DynProps:
+    """ Return an instance of cls whose Local properties are set from the delimited text in text
+
+    Values are loaded as text, with empty fields loaded as None.  Global properties are not set.
+
+    :param cls: DynProps class of the row
+    :param text: row text
+    :param columns: the columns in text, if not all of the properties of cls
+    """
+    inst = cls.__new__(cls)
+    values = next(csv.reader(io.StringIO(text, newline=''), dialect=dynprops_dialect))
+    for k, v in zip(cls._keys if columns is None else columns, values):
+        if not cls._get_prop(k).is_global:
+            setattr(inst, k, v if v != '' else None)
+    return inst
+
+
+def export(cls: DynPropsMeta, instances: Iterable[DynProps], path: str, index: bool=False,
+           key: Optional[str]=None, compression: Optional[str]=None, background: bool=False,
+           checkpoint_every: Optional[int]=None, resume: bool=False, stats: bool=False,
+           columns: Optional[List[str]]=None, where: Optional[RowPredicate]=None) -> int:
+    """ Write the heading of cls and the rows in instances to path
+
+    When resuming from a checkpoint, the instances that were already processed are skipped and the remaining rows
+    are written with the Global values recorded in the checkpoint.
+
+    :param cls: DynProps class being exported
+    :param instances: instances of cls to write
+    :param path: name of the output file
+    :param index: True means write a sidecar byte offset index
+    :param key: column to build a key to offset map for
+    :param compression: compress the output with one of the methods in compressors
+    :param background: True means compress and write the output in a separate thread
+    :param checkpoint_every: write a checkpoint every checkpoint_every instances
+    :param resume: True means continue from the checkpoint of an earlier, unfinished, run if there is one
+    :param stats: True means write column statistics for the rows in the output (path + stats_suffix)
+    :param columns: properties to write.  Default is all of them
+    :param where: only write the instances for which where(inst) is true.  Evaluated before anything is reified
+    :return: number of rows in the output
+    """
+    collector = ColumnStats(cls, columns=columns) if stats else None
+    with RowWriter(cls, path, index, key, compression, background, checkpoint_every, resume, collector,
+                   columns, where) as writer:
+        if writer.resumed_globals is not None:
+            instances = islice(instances, writer.nseen, None)
+        with global_scope(cls, **(writer.resumed_globals or {})):
+            for inst in instances:
+                writer.write(inst)
+    if collector is not None:
+        collector.write(path + stats_suffix)
+    return writer.nrows
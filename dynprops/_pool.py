@@ -0,0 +1,69 @@
+import weakref
+from typing import Optional, Callable, List, Dict, Tuple
+
+from dynprops._dynprops import DynProps, DynPropsMeta
+
+
+class InstancePool:
+    def __init__(self, cls: DynPropsMeta, factory: Optional[Callable[[], DynProps]]=None, max_size: int=64) -> None:
+        """ Recycled instances of cls for short lived use
+
+        Instances are reset (see reset()) when they are returned, so Local values set while one was borrowed never
+        show up in the next use.  Locals set by the factory are put back after the reset, so a recycled instance
+        starts out the same as a new one.  Attributes that are not Local properties are left as they are.
+
+        :param cls: DynProps class to pool
+        :param factory: function to create a new instance.  Default is an instance of cls without calling __init__
+        :param max_size: maximum number of idle instances to keep
+        """
+        self.cls = cls
+        self.factory = factory if factory is not None else lambda: cls.__new__(cls)
+        self.max_size = max_size
+        self.created = 0
+        self._free: List[DynProps] = []
+        # Local settings made by the factory, by id of the instance it made
+        self._initial: Optional[Dict[int, Tuple[weakref.ref, Dict[str, object]]]] = {} if factory else None
+
+    def acquire(self) -> DynProps:
+        """ Return an idle instance, creating one if there aren't any """
+        try:
+            return self._free.pop()
+        except IndexError:
+            self.created += 1
+            inst = self.factory()
+            if self._initial is not None:
+                state = inst.__dict__
+                initial = {'_' + k: state['_' + k] for k in inst._local_keys() if '_' + k in state}
+                if initial:
+                    self._initial[id(inst)] = (weakref.ref(inst), initial)
+                    weakref.finalize(inst, self._initial.pop, id(inst), None)
+            return inst
+
+    def release(self, inst: DynProps) -> None:
+        """ Reset inst to the state it was created in and return it to the pool """
+        inst._reset()
+        if self._initial:
+            ref, initial = self._initial.get(id(inst), (None, None))
+            if ref is not None and ref() is inst:
+                inst.__dict__.update(initial)
+        if len(self._free) < self.max_size:
+            self._free.append(inst)
+
+    def borrow(self) -> "_Borrowed":
+        """ Return a context manager that acquires an instance and releases it on exit """
+        return _Borrowed(self)
+
+
+class _Borrowed:
+    """ Instance borrowed from a pool.  A class rather than @contextmanager to keep per row overhead down """
+    __slots__ = ('pool', 'inst')
+
+    def __init__(self, pool: InstancePool) -> None:
+        self.pool = pool
+
+    def __enter__(self) -> DynProps:
+        self.inst = self.pool.acquire()
+        return self.inst
+
+    def __exit__(self, *_) -> None:
+        self.pool.release(self.inst)
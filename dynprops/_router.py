@@ -0,0 +1,129 @@
+import os
+from collections import OrderedDict
+from typing import Union, Callable, Iterable, Dict, List, BinaryIO, Optional
+
+from dynprops._dynprops import DynProps, DynPropsMeta, RowPredicate, heading
+from dynprops._stats import ColumnStats, stats_suffix
+
+# Where to write the rows of a class: either a directory (rows go to '<directory>/<class name>.tsv') or a function
+# that returns the file name for a class
+RoutePath = Union[str, Callable[[DynPropsMeta], str]]
+
+
+class _ClassSink:
+    """ Pending output for one class """
+    def __init__(self, cls: DynPropsMeta, path: str, stats: bool, columns: Optional[List[str]]) -> None:
+        cls._check_columns(columns)
+        self.cls = cls
+        self.path = path
+        self.columns = columns
+        self.pending: List[str] = []
+        self.nrows = 0
+        self.started = False
+        self.stats = ColumnStats(cls, columns=columns) if stats else None
+
+
+class StreamRouter:
+    def __init__(self, path: RoutePath, max_open: int=16, batch_size: int=1000, stats: bool=False,
+                 columns: Optional[Dict[DynPropsMeta, List[str]]]=None, where: Optional[RowPredicate]=None) -> None:
+        """ Sink that writes each instance it is given to a file for the instance's class
+
+        Files are created on the first flush of a class and begin with the heading of the class.  At most max_open
+        files are held open at a time, with the least recently written one being closed (and later reopened for
+        append) when the limit is reached.
+
+        :param path: directory or function that names the output file for a class
+        :param max_open: maximum number of simultaneously open files
+        :param batch_size: number of rows to hold per class before writing them
+        :param stats: True means write column statistics for each class next to its output (path + stats_suffix)
+        :param columns: properties to write for a class.  Classes that aren't in columns get all of their properties
+        :param where: only write the instances for which where(inst) is true.  Evaluated before anything is reified
+        """
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.path_for: Callable[[DynPropsMeta], str] = \
+            (lambda cls: os.path.join(path, cls.__name__ + '.tsv')) if isinstance(path, str) else path
+        self.max_open = max_open
+        self.batch_size = batch_size
+        self.stats = stats
+        self.columns = columns or {}
+        self.where = where
+        self._sinks: Dict[DynPropsMeta, _ClassSink] = OrderedDict()
+        self._open: Dict[DynPropsMeta, BinaryIO] = OrderedDict()
+
+    @property
+    def counts(self) -> Dict[DynPropsMeta, int]:
+        """ Number of rows written for each class """
+        return OrderedDict((cls, sink.nrows) for cls, sink in self._sinks.items())
+
+    def _stream(self, sink: _ClassSink) -> BinaryIO:
+        stream = self._open.get(sink.cls)
+        if stream is not None:
+            self._open.move_to_end(sink.cls)
+            return stream
+        if len(self._open) >= self.max_open:
+            self._open.popitem(last=False)[1].close()
+        if sink.started:
+            stream = open(sink.path, 'ab')
+        else:
+            stream = open(sink.path, 'wb')
+            stream.write((heading(sink.cls, sink.columns) + '\n').encode())
+            sink.started = True
+        self._open[sink.cls] = stream
+        return stream
+
+    def _flush(self, sink: _ClassSink) -> None:
+        if sink.pending:
+            sink.pending.append('')
+            self._stream(sink).write('\n'.join(sink.pending).encode())
+            sink.pending = []
+
+    def write(self, inst: DynProps) -> None:
+        """ Add the delimited representation of inst to the output for its class if it passes the where filter """
+        if self.where is not None and not self.where(inst):
+            return
+        cls = type(inst)._view_of or type(inst)
+        sink = self._sinks.get(cls)
+        if sink is None:
+            sink = self._sinks[cls] = _ClassSink(cls, self.path_for(cls), self.stats, self.columns.get(cls))
+        values = tuple(inst._values(sink.columns))
+        if sink.stats is not None:
+            sink.stats.add(values)
+        sink.pending.append(inst._delimit(values))
+        sink.nrows += 1
+        if len(sink.pending) >= self.batch_size:
+            self._flush(sink)
+
+    def flush(self) -> None:
+        """ Write all pending rows """
+        for sink in self._sinks.values():
+            self._flush(sink)
+
+    def close(self) -> None:
+        """ Write all pending rows and statistics and close all files """
+        self.flush()
+        for stream in self._open.values():
+            stream.close()
+        self._open.clear()
+        for sink in self._sinks.values():
+            if sink.stats is not None:
+                sink.stats.write(sink.path + stats_suffix)
+
+    def __enter__(self) -> "StreamRouter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def route(instances: Iterable[DynProps], path: RoutePath, max_open: int=16,
+          batch_size: int=1000, stats: bool=False, columns: Optional[Dict[DynPropsMeta, List[str]]]=None,
+          where: Optional[RowPredicate]=None) -> Dict[DynPropsMeta, int]:
+    """ Write a mixed stream of instances to one file per class.  See StreamRouter for details
+
+    :return: number of rows written for each class
+    """
+    with StreamRouter(path, max_open, batch_size, stats, columns, where) as router:
+        for inst in instances:
+            router.write(inst)
+    return router.counts
@@ -0,0 +1,42 @@
+import pickle
+from typing import Iterable, List, Dict, Tuple
+
+from dynprops._dynprops import DynProps, DynPropsMeta
+
+# A batch is pickled as a tuple of:
+#   1) A list of (class, schema version) pairs for the classes in the batch
+#   2) A list of rows.  Each row is (class position, Local mask, Local values) plus the other instance state, if any
+#      (see DynProps._pickle_state)
+
+
+def dumps_batch(instances: Iterable[DynProps], reify: bool=False) -> bytes:
+    """ Serialize instances into a single binary block
+
+    :param instances: instances to serialize.  They may be of different DynProps classes.  Record views are
+    serialized as ordinary instances of the class they view
+    :param reify: True means serialize the reified values of the Locals rather than what was set (e.g. lambdas)
+    :return: pickled batch
+    """
+    classes: Dict[DynPropsMeta, int] = {}
+    rows: List[Tuple] = []
+    for inst in instances:
+        inst = inst._materialize()
+        cls = type(inst)._view_of or type(inst)
+        pos = classes.get(cls)
+        if pos is None:
+            pos = classes[cls] = len(classes)
+        mask, values, others = inst._pickle_state(reify)
+        rows.append((pos, mask, values) if others is None else (pos, mask, values, others))
+    return pickle.dumps(([(cls, cls._pickle_version()) for cls in classes], rows), pickle.HIGHEST_PROTOCOL)
+
+
+def loads_batch(data: bytes) -> List[DynProps]:
+    """ Return the instances in a block written by dumps_batch """
+    classes, rows = pickle.loads(data)
+    rval = []
+    for r in rows:
+        cls, schema_version = classes[r[0]]
+        inst = cls.__new__(cls)
+        inst._load_pickle_state(schema_version, *r[1:])
+        rval.append(inst)
+    return rval
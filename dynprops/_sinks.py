@@ -0,0 +1,112 @@
+import json
+import os
+from typing import Optional, Iterable, List, Dict
+
+from dynprops._dynprops import DynProps, DynPropsMeta, RowPredicate, heading
+from dynprops._export import RowWriter, compression_suffixes
+from dynprops._stats import ColumnStats, stats_suffix
+
+manifest_suffix = '.manifest.json'
+
+
+class ShardedSink:
+    def __init__(self, cls: DynPropsMeta, path: str, max_rows: Optional[int]=None, max_bytes: Optional[int]=None,
+                 compression: Optional[str]=None, background: bool=False, stats: bool=False,
+                 columns: Optional[List[str]]=None, where: Optional[RowPredicate]=None) -> None:
+        """ Row sink that spreads its output across a series of files (shards)
+
+        Shard n of 'out/facts.tsv' is named 'out/facts.<nnnnn>.tsv', plus the compression suffix if any. Every
+        shard starts with the heading of cls.  A manifest ('out/facts.manifest.json') listing the shards and their
+        row counts is written when the sink is closed.  If the sink is left because of an exception, the current
+        shard is closed but no manifest (or statistics) is written, so a manifest always describes a complete export.
+
+        :param cls: DynProps class being exported
+        :param path: base name of the output files
+        :param max_rows: start a new shard once the current one holds this many rows
+        :param max_bytes: start a new shard once the current one holds this many (uncompressed) bytes
+        :param compression: compress the shards with one of the methods in compressors
+        :param background: True means compress and write each shard in a separate thread
+        :param stats: True means write column statistics for all of the shards ('out/facts.tsv.stats.json')
+        :param columns: properties to write.  Default is all of them
+        :param where: only write the instances for which where(inst) is true.  Evaluated before anything is reified
+        """
+        cls._check_columns(columns)
+        if compression is not None and compression not in compression_suffixes:
+            raise ValueError(f"Unknown compression: {compression}")
+        self.cls = cls
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.compression = compression
+        self.background = background
+        self.columns = columns
+        self.where = where
+        self.nrows = 0
+        self.shards: List[Dict[str, object]] = []
+        self.stats = ColumnStats(cls, columns=columns) if stats else None
+        self.path = path
+        self._root, self._ext = os.path.splitext(path)
+        self._writer: Optional[RowWriter] = None
+
+    @property
+    def manifest_path(self) -> str:
+        return self._root + manifest_suffix
+
+    @property
+    def stats_path(self) -> str:
+        return self.path + stats_suffix
+
+    def _shard_path(self, n: int) -> str:
+        return f"{self._root}.{n:05d}{self._ext}" + (compression_suffixes[self.compression]
+                                                    if self.compression else '')
+
+    def _close_shard(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self.shards.append(dict(path=os.path.basename(self._writer.path), rows=self._writer.nrows,
+                                    bytes=self._writer.nbytes))
+            self._writer = None
+
+    def write(self, inst: DynProps) -> None:
+        """ Append the delimited representation of inst to the current shard if it passes the where filter """
+        if self.where is not None and not self.where(inst):
+            return
+        if self._writer is None:
+            self._writer = RowWriter(self.cls, self._shard_path(len(self.shards)), compression=self.compression,
+                                     background=self.background, stats=self.stats, columns=self.columns)
+        self._writer.write(inst)
+        self.nrows += 1
+        if (self.max_rows is not None and self._writer.nrows >= self.max_rows) or \
+                (self.max_bytes is not None and self._writer.nbytes >= self.max_bytes):
+            self._close_shard()
+
+    def close(self) -> None:
+        """ Close the last shard and write the manifest and statistics """
+        self._close_shard()
+        if self.stats is not None:
+            self.stats.write(self.stats_path)
+        with open(self.manifest_path, 'w') as manifest:
+            json.dump(dict(heading=heading(self.cls, self.columns), compression=self.compression, rows=self.nrows,
+                           shards=self.shards), manifest, indent=2)
+
+    def __enter__(self) -> "ShardedSink":
+        return self
+
+    def __exit__(self, exc_type, *_) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._close_shard()
+
+
+def export_shards(cls: DynPropsMeta, instances: Iterable[DynProps], path: str, max_rows: Optional[int]=None,
+                  max_bytes: Optional[int]=None, compression: Optional[str]=None,
+                  background: bool=False, stats: bool=False, columns: Optional[List[str]]=None,
+                  where: Optional[RowPredicate]=None) -> List[Dict[str, object]]:
+    """ Write the rows in instances to a series of shards named after path.  See ShardedSink for details
+
+    :return: list of shard descriptions as recorded in the manifest
+    """
+    with ShardedSink(cls, path, max_rows, max_bytes, compression, background, stats, columns, where) as sink:
+        for inst in instances:
+            sink.write(inst)
+    return sink.shards
@@ -0,0 +1,135 @@
+import heapq
+import os
+import pickle
+import tempfile
+from numbers import Number
+from typing import Optional, Iterable, Iterator, List, Tuple
+
+from dynprops._dynprops import DynProps, DynPropsMeta, RowPredicate, heading
+from dynprops._export import open_output
+
+# A sortable entry: (sort key, delimited row)
+SortEntry = Tuple[object, str]
+
+
+def _sort_key(values: Tuple, positions: Optional[List[int]], text: str) -> object:
+    """ Sort on the selected values with None first.  Values of different types are ordered by type name, with all
+    numbers together, so a column that mixes them (e.g. int and str) still sorts.  No columns means sort on the row
+    text, which is the ordering used by DynProps.__lt__ """
+    if positions is None:
+        return text
+    return tuple((values[p] is not None, '' if isinstance(values[p], Number) else type(values[p]).__name__, values[p])
+                 for p in positions)
+
+
+def _write_run(entries: Iterable[SortEntry], directory: Optional[str]) -> str:
+    """ Write entries to a new temporary file and return its name """
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.run', delete=False) as f:
+        try:
+            for entry in entries:
+                f.write(pickle.dumps(entry, pickle.HIGHEST_PROTOCOL))
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    return f.name
+
+
+def _read_run(path: str) -> Iterator[SortEntry]:
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                break
+
+
+def _merge_runs(runs: List[str], directory: Optional[str]) -> str:
+    """ Merge sorted runs into a new run, removing them """
+    readers = [_read_run(path) for path in runs]
+    try:
+        merged = _write_run(heapq.merge(*readers), directory)
+    finally:
+        for reader in readers:
+            reader.close()
+    for path in runs:
+        os.remove(path)
+    return merged
+
+
+def sort_export(cls: DynPropsMeta, instances: Iterable[DynProps], path: str, order_by: Optional[List[str]]=None,
+                run_size: int=100000, tmpdir: Optional[str]=None, compression: Optional[str]=None,
+                columns: Optional[List[str]]=None, where: Optional[RowPredicate]=None, max_fan_in: int=64) -> int:
+    """ Write the rows in instances to path in sorted order, using bounded memory
+
+    Each instance is reified once.  Rows are collected into runs of run_size entries which are sorted on their
+    precomputed keys and spilled to temporary files, which are then merged into the output.  Run files are only
+    open while they are being merged, and at most max_fan_in of them are merged at a time, with intermediate merge
+    passes reducing the number of runs as needed.
+
+    :param cls: DynProps class being exported
+    :param instances: instances of cls to write
+    :param path: name of the output file
+    :param order_by: names of the properties to sort on.  Ties (or no order_by at all) are ordered by the row text.
+    Values of different types in one column are ordered by type name, numbers first
+    :param run_size: maximum number of rows to hold in memory
+    :param tmpdir: directory for the sorted runs.  Default is the system temporary directory
+    :param compression: compress the output with one of the methods in compressors
+    :param columns: properties to write.  Default is all of them.  order_by properties need not be included
+    :param where: only write the instances for which where(inst) is true.  Evaluated before anything is reified
+    :param max_fan_in: maximum number of runs to merge (and hold open) at once
+    :return: number of rows written
+    """
+    if run_size < 1:
+        raise ValueError("run_size must be at least 1")
+    if max_fan_in < 2:
+        raise ValueError("max_fan_in must be at least 2")
+    cls._check_columns(columns)
+    cls._check_columns(order_by)
+    # Reify the output columns followed by any additional sort columns
+    output_columns = cls._keys if columns is None else columns
+    needed = list(output_columns) + [c for c in (order_by or []) if c not in output_columns]
+    positions = [needed.index(c) for c in order_by] if order_by is not None else None
+    noutput = len(output_columns)
+
+    nrows = 0
+    run: List[SortEntry] = []
+    runs: List[str] = []
+    readers: List[Iterator[SortEntry]] = []
+    try:
+        for inst in instances:
+            if where is not None and not where(inst):
+                continue
+            values = tuple(inst._values(needed))
+            text = cls._delimit(values[:noutput])
+            run.append((_sort_key(values, positions, text), text))
+            nrows += 1
+            if len(run) >= run_size:
+                run.sort()
+                runs.append(_write_run(run, tmpdir))
+                run = []
+        if runs:
+            if run:
+                run.sort()
+                runs.append(_write_run(run, tmpdir))
+                run = []
+            while len(runs) > max_fan_in:
+                runs.append(_merge_runs(runs[:max_fan_in], tmpdir))
+                del runs[:max_fan_in]
+            readers = [_read_run(run_path) for run_path in runs]
+            entries = heapq.merge(*readers)
+        else:
+            run.sort()
+            entries = iter(run)
+
+        with open_output(path, compression) as output:
+            output.write((heading(cls, columns) + '\n').encode())
+            for _, text in entries:
+                output.write((text + '\n').encode())
+    finally:
+        for reader in readers:
+            reader.close()
+        for run_path in runs:
+            if os.path.exists(run_path):
+                os.remove(run_path)
+    return nrows
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import math
+from typing import Sequence, Dict, List, Optional, Tuple
+
+from dynprops._dynprops import DynProps, DynPropsMeta
+
+# Column statistics report suffix.  The report for output file 'out/facts.tsv' is 'out/facts.tsv.stats.json'
+stats_suffix = '.stats.json'
+
+
+class HyperLogLog:
+    def __init__(self, precision: int=12) -> None:
+        """ Constant memory distinct count estimator
+
+        :param precision: log2 of the number of registers.  The standard error is about 1.04/sqrt(2**precision)
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self._nregisters = 1 << precision
+        self._registers = bytearray(self._nregisters)
+
+    def add(self, text: str) -> None:
+        h = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+        register = h & (self._nregisters - 1)
+        rest = h >> self.precision
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self._registers[register]:
+            self._registers[register] = rank
+
+    def estimate(self) -> int:
+        m = self._nregisters
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))         # Small range (linear counting) correction
+        return round(raw)
+
+
+class _Column:
+    """ Statistics for one column """
+    def __init__(self, precision: int) -> None:
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.comparable = True
+        self.max_length = 0
+        self.distinct = HyperLogLog(precision)
+
+    def add(self, v: object) -> None:
+        if v is None:
+            self.nulls += 1
+            return
+        text = str(v)
+        if len(text) > self.max_length:
+            self.max_length = len(text)
+        self.distinct.add(text)
+        if self.comparable:
+            try:
+                if self.min is None or v < self.min:
+                    self.min = v
+                if self.max is None or v > self.max:
+                    self.max = v
+            except TypeError:
+                self.comparable = False
+                self.min = self.max = None
+
+
+class ColumnStats:
+    def __init__(self, cls: DynPropsMeta, precision: int=12, columns: Optional[List[str]]=None) -> None:
+        """ Single pass statistics for the columns of cls: null count, minimum, maximum, maximum text length and
+        estimated number of distinct values
+
+        :param cls: DynProps class being exported
+        :param precision: HyperLogLog precision for the distinct value estimates
+        :param columns: the columns being exported, if not all of the properties of cls
+        """
+        cls._check_columns(columns)
+        self.cls = cls
+        self.precision = precision
+        self.columns = cls._keys if columns is None else columns
+        self.nrows = 0
+        self._columns: List[_Column] = [_Column(precision) for _ in self.columns]
+
+    def add(self, values: Sequence[object]) -> None:
+        """ Add a row of reified values in column order """
+        self.nrows += 1
+        for column, v in zip(self._columns, values):
+            column.add(v)
+
+    def add_instance(self, inst: DynProps) -> None:
+        """ Add the values of inst """
+        self.add(tuple(inst._values(self.columns)))
+
+    def _state(self) -> Tuple:
+        """ Return the statistics collected so far in picklable form (e.g. for a checkpoint) """
+        return list(self.columns), self.precision, self.nrows, self._columns
+
+    def _load_state(self, state: Tuple) -> None:
+        """ Replace the statistics collected so far with state, as returned by _state """
+        columns, precision, nrows, column_stats = state
+        if columns != list(self.columns) or precision != self.precision:
+            raise ValueError(f"Statistics for columns {columns} (precision {precision}) cannot be loaded into "
+                             f"statistics for columns {list(self.columns)} (precision {self.precision})")
+        self.nrows = nrows
+        self._columns = column_stats
+
+    def report(self) -> Dict[str, object]:
+        """ Return the statistics as a JSON serializable dictionary.  Minimum and maximum values are given as text
+        and are None if the column is empty or has values that can't be compared """
+        columns = {}
+        for k, column in zip(self.columns, self._columns):
+            columns[k] = dict(nulls=column.nulls,
+                              min=str(column.min) if column.min is not None else None,
+                              max=str(column.max) if column.max is not None else None,
+                              max_length=column.max_length,
+                              distinct=min(column.distinct.estimate(), self.nrows - column.nulls))
+        return {'class': self.cls.__name__, 'rows': self.nrows, 'columns': columns}
+
+    def write(self, path: str) -> None:
+        """ Write the report to path """
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
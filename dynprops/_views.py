@@ -0,0 +1,103 @@
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Optional, Iterable, Iterator, Dict, Union, Callable, Any
+
+from dynprops._dynprops import DynProps, DynPropsMeta
+
+# A record field is identified by:
+#   1) An integer:      position in a tuple or other sequence (e.g. a DB cursor row)
+#   2) A string:        key in a dictionary or other mapping
+#   3) A function:      f(record) -> object
+RecordField = Union[int, str, Callable[[Any], object]]
+RecordFields = Dict[str, RecordField]
+
+# Maximum number of view classes kept per viewed class.  Field maps are compared by value, so a map built afresh
+# with new functions in it (e.g. a lambda per call) gets a class of its own
+view_cache_size = 32
+
+
+def _view_class(cls: DynPropsMeta, fields: RecordFields) -> DynPropsMeta:
+    """ Return the (cached) subclass of cls whose mapped Local properties are read from the bound record.  The
+    least recently used classes are dropped once there are more than view_cache_size of them """
+    cache = cls.__dict__.get('_view_classes')
+    if cache is None:
+        cache = OrderedDict()
+        cls._view_classes = cache
+    cache_key = tuple(fields.items())
+    rval = cache.get(cache_key)
+    if rval is None:
+        rval = cache[cache_key] = _new_view_class(cls, fields)
+        if len(cache) > view_cache_size:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(cache_key)
+    return rval
+
+
+def _new_view_class(cls: DynPropsMeta, fields: RecordFields) -> DynPropsMeta:
+    ns = dict(__annotations__={}, __qualname__=cls.__qualname__, __module__=cls.__module__, _view_of=cls)
+    for k, field in fields.items():
+        p = cls._get_prop(k) if k in cls._keys else None
+        if not p:
+            raise ValueError(f"{k} is not a property of {cls.__name__}")
+        if p.is_global:
+            raise ValueError(f"{k} is a Global property and cannot be mapped to a record field")
+        getter = field if callable(field) else itemgetter(field)
+        ns['_' + k] = property(lambda self, g=getter: g(self._dyn_record))
+
+    def _materialize(self) -> DynProps:
+        """ Return an ordinary instance of cls holding the values of the bound record """
+        inst = cls.__new__(cls)
+        state = inst.__dict__
+        state.update((k, v) for k, v in self.__dict__.items() if k != '_dyn_record')
+        if self._dyn_record is not None:
+            for mapped in fields:
+                state['_' + mapped] = getattr(self, '_' + mapped)
+        return inst
+
+    def __reduce__(self):
+        """ Pickle the view as an ordinary instance of cls """
+        return cls.__new__, (cls, ), self._materialize().__getstate__()
+    ns['_materialize'] = _materialize
+    ns['__reduce__'] = __reduce__
+    return type(cls)(cls.__name__, (cls,), ns)
+
+
+def record_view(cls: DynPropsMeta, fields: Optional[RecordFields]=None) -> DynProps:
+    """ Return a reusable, read-only view of cls over source records
+
+    The view is an instance of (a subclass of) cls whose mapped Local properties come from the record bound with
+    bind(), while Globals, unmapped Locals and methods behave exactly as they do on ordinary instances.  Views of
+    the same class and fields share one subclass, whose _view_of attribute is cls.  Exporters that choose the output
+    by class (e.g. StreamRouter) treat a view as an instance of cls, and a pickled view loads as an instance of cls.
+
+    :param cls: DynProps class to view records as
+    :param fields: map from Local property name to record field.  Defaults to cls._record_fields.  Declare field
+    maps once (e.g. as _record_fields or a module level constant) rather than building them per call, so that their
+    view class is reused
+    :return: unbound view
+    """
+    if fields is None:
+        fields = cls._record_fields
+        if fields is None:
+            raise ValueError(f"{cls.__name__} does not declare _record_fields")
+    view = object.__new__(_view_class(cls, fields))
+    view.__dict__['_dyn_record'] = None
+    return view
+
+
+def bind(view: DynProps, record: Any) -> DynProps:
+    """ Bind view to record and return it """
+    view.__dict__['_dyn_record'] = record
+    return view
+
+
+def views(cls: DynPropsMeta, records: Iterable[Any], fields: Optional[RecordFields]=None) -> Iterator[DynProps]:
+    """ Yield a single view of cls bound to each record in turn
+
+    Note that the same object is returned on every iteration, so values have to be consumed (e.g. by row() or
+    as_dict()) before advancing.
+    """
+    view = record_view(cls, fields)
+    for record in records:
+        yield bind(view, record)
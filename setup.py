@@ -9,6 +9,7 @@ setup(
     author_email='solbrig@solbrig-informatics.com',
     description='Dynamic Properties - support for complex tsv and sql values',
     packages=['dynprops'],
+    install_requires=['contextvars;python_version<"3.7"'],
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Environment :: Console',
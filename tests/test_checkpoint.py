@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import unittest
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, heading, row, export, IndexedRows, checkpoint_suffix, \
+    stats_suffix
+
+
+class I2B2Core(DynProps):
+    upload_id: Global[Optional[int]]
+
+
+class ObservationFact(I2B2Core):
+    instance_num: Local[int]
+    _: Parent
+
+
+reified = []
+
+
+def facts(nrows: int, fail_at: Optional[int]=None):
+    for n in range(nrows):
+        if n == fail_at:
+            raise RuntimeError("Extraction failed")
+        x = ObservationFact()
+        x.instance_num = lambda n=n: reified.append(n) or n
+        yield x
+
+
+class CheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'facts.tsv')
+        reified.clear()
+
+    def tearDown(self):
+        clear(I2B2Core)
+        self.tmpdir.cleanup()
+
+    def expected(self, nrows: int, upload_id: int) -> str:
+        return ''.join(line + '\n' for line in [heading(ObservationFact)] +
+                       [f"{n}\t{upload_id}" for n in range(nrows)])
+
+    def output(self) -> str:
+        with open(self.path) as f:
+            return f.read()
+
+    def test_resume(self):
+        I2B2Core.upload_id = 1
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=25), self.path, index=True, checkpoint_every=10)
+        self.assertTrue(os.path.exists(self.path + checkpoint_suffix))
+        self.assertEqual(list(range(25)), reified)
+
+        # The rows written after the last checkpoint are redone with the Globals of the original run
+        reified.clear()
+        I2B2Core.upload_id = 2
+        self.assertEqual(50, export(ObservationFact, facts(50), self.path, index=True, checkpoint_every=10,
+                                    resume=True))
+        self.assertEqual(list(range(20, 50)), reified)
+        self.assertEqual(self.expected(50, 1), self.output())
+        self.assertFalse(os.path.exists(self.path + checkpoint_suffix))
+        with IndexedRows(ObservationFact, self.path) as rows:
+            self.assertEqual(50, len(rows))
+            self.assertEqual("37\t2", row(rows[37]))
+        self.assertEqual(2, I2B2Core.upload_id)
+
+    def test_resume_without_checkpoint(self):
+        I2B2Core.upload_id = 3
+        self.assertEqual(12, export(ObservationFact, facts(12), self.path, checkpoint_every=5, resume=True))
+        self.assertEqual(self.expected(12, 3), self.output())
+        self.assertFalse(os.path.exists(self.path + checkpoint_suffix))
+
+    def test_background_checkpoint(self):
+        I2B2Core.upload_id = 4
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=33), self.path, checkpoint_every=8, background=True)
+        reified.clear()
+        export(ObservationFact, facts(50), self.path, background=True, resume=True)
+        self.assertEqual(list(range(32, 50)), reified)
+        self.assertEqual(self.expected(50, 4), self.output())
+
+    def test_resumed_stats(self):
+        I2B2Core.upload_id = 7
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=25), self.path, checkpoint_every=10, stats=True)
+        self.assertFalse(os.path.exists(self.path + stats_suffix))
+        export(ObservationFact, facts(50), self.path, checkpoint_every=10, resume=True, stats=True)
+        with open(self.path + stats_suffix) as f:
+            report = json.load(f)
+        self.assertEqual(50, report['rows'])
+        self.assertEqual(dict(nulls=0, min='0', max='49', max_length=2, distinct=50),
+                         report['columns']['instance_num'])
+
+        # Statistics can't be resumed from a checkpoint that has none
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=25), self.path, checkpoint_every=10)
+        with self.assertRaises(ValueError):
+            export(ObservationFact, facts(50), self.path, resume=True, stats=True)
+
+    def test_stale_checkpoint(self):
+        I2B2Core.upload_id = 5
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=25), self.path, checkpoint_every=10)
+        # A fresh run discards the checkpoint of the earlier one, even if it fails before writing its own
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=2), self.path)
+        self.assertFalse(os.path.exists(self.path + checkpoint_suffix))
+        self.assertEqual(50, export(ObservationFact, facts(50), self.path, checkpoint_every=10, resume=True))
+        self.assertEqual(self.expected(50, 5), self.output())
+
+    def test_mismatched_checkpoint(self):
+        class PatientDimension(I2B2Core):
+            patient_num: Local[int]
+            _: Parent
+
+        I2B2Core.upload_id = 6
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, facts(50, fail_at=25), self.path, checkpoint_every=10)
+        with self.assertRaises(ValueError):
+            export(PatientDimension, [], self.path, resume=True)
+
+        # The data file no longer holds the checkpointed rows
+        with open(self.path, 'r+b') as f:
+            f.truncate(100)
+        with self.assertRaises(ValueError):
+            export(ObservationFact, facts(50), self.path, resume=True)
+        self.assertEqual(100, os.path.getsize(self.path))
+
+        with open(self.path, 'w') as f:
+            f.write(heading(PatientDimension) + '\n' + 'x' * 1000)
+        with self.assertRaises(ValueError):
+            export(ObservationFact, facts(50), self.path, resume=True)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            export(ObservationFact, [], self.path, compression='gzip', checkpoint_every=10)
+        with self.assertRaises(ValueError):
+            export(ObservationFact, [], self.path, key='instance_num', resume=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, heading, row, export, IndexedRows, load_row, \
+    index_suffix, keymap_suffix
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+    upload_id: Global[Optional[int]]
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str]
+    modifier_cd: Local[str] = "@"
+    tval_char: Local[Optional[str]]
+    _: Parent
+
+    def __init__(self, concept_cd: str, tval_char: Optional[str]=None) -> None:
+        self.concept_cd = concept_cd
+        self.tval_char = tval_char
+
+
+def facts():
+    return [ObservationFact("LOINC:1234", "first"),
+            ObservationFact("SCT:9999"),
+            ObservationFact("LOINC:1234", "second"),
+            ObservationFact("LOINC:5678", "tab\there")]
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'facts.tsv')
+        I2B2Core.upload_id = 117
+
+    def tearDown(self):
+        clear(I2B2Core)
+        self.tmpdir.cleanup()
+
+    def test_plain_export(self):
+        self.assertEqual(4, export(ObservationFact, facts(), self.path))
+        self.assertFalse(os.path.exists(self.path + index_suffix))
+        self.assertFalse(os.path.exists(self.path + keymap_suffix))
+        with open(self.path) as f:
+            text = f.read()
+        self.assertEqual('\n'.join([heading(ObservationFact)] + [row(f) for f in facts()]) + '\n', text)
+
+    def test_positional_access(self):
+        export(ObservationFact, facts(), self.path, index=True)
+        self.assertFalse(os.path.exists(self.path + keymap_suffix))
+        with IndexedRows(ObservationFact, self.path) as rows:
+            self.assertEqual(4, len(rows))
+            for expected, actual in zip(facts(), [rows[n] for n in range(len(rows))]):
+                self.assertEqual(row(expected), row(actual))
+            self.assertEqual("second", rows[2].tval_char)
+            self.assertIsNone(rows[1].tval_char)
+            self.assertEqual("tab\there", rows[-1].tval_char)
+            with self.assertRaises(IndexError):
+                _ = rows[4]
+            with self.assertRaises(ValueError):
+                rows.get("LOINC:1234")
+
+    def test_key_access(self):
+        export(ObservationFact, facts(), self.path, key='concept_cd')
+        with IndexedRows(ObservationFact, self.path) as rows:
+            self.assertEqual(["first", "second"], [r.tval_char for r in rows.get("LOINC:1234")])
+            self.assertEqual(["tab\there"], [r.tval_char for r in rows.get("LOINC:5678")])
+            self.assertEqual([], rows.get("LOINC:0000"))
+        with self.assertRaises(ValueError):
+            export(ObservationFact, facts(), self.path, key='not_a_column')
+
+    def test_load_row(self):
+        x = load_row(ObservationFact, row(ObservationFact("SCT:1", "v")))
+        self.assertTrue(isinstance(x, ObservationFact))
+        self.assertEqual("SCT:1", x.concept_cd)
+        self.assertEqual(117, x.upload_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
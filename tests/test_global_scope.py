@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import threading
+import unittest
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, row, global_scope
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+    upload_id: Global[Optional[int]]
+    download_date: Global[Optional[str]] = lambda: I2B2Core.sourcesystem_cd + "-date"
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str] = "LOINC:1234"
+    _: Parent
+
+
+class GlobalScopeTestCase(unittest.TestCase):
+    def tearDown(self):
+        clear(I2B2Core)
+
+    def test_scope(self):
+        I2B2Core.upload_id = 1
+        x = ObservationFact()
+        self.assertEqual('LOINC:1234\tUnspecified\t1\tUnspecified-date', row(x))
+        with global_scope(ObservationFact, upload_id=2, sourcesystem_cd="SS2"):
+            self.assertEqual(2, I2B2Core.upload_id)
+            self.assertEqual(2, x.upload_id)
+            self.assertEqual('LOINC:1234\tSS2\t2\tSS2-date', row(x))
+            with global_scope(I2B2Core, upload_id=3):
+                self.assertEqual('LOINC:1234\tSS2\t3\tSS2-date', row(x))
+            self.assertEqual('LOINC:1234\tSS2\t2\tSS2-date', row(x))
+            # Class level settings are hidden, but not lost
+            I2B2Core.upload_id = 4
+            self.assertEqual(2, x.upload_id)
+        self.assertEqual(4, x.upload_id)
+        self.assertEqual('LOINC:1234\tUnspecified\t4\tUnspecified-date', row(x))
+
+    def test_bad_scope(self):
+        with self.assertRaises(ValueError):
+            with global_scope(ObservationFact, concept_cd="SCT:1"):
+                pass
+        with self.assertRaises(ValueError):
+            with global_scope(I2B2Core, upload_id_=1):
+                pass
+
+    def test_threads(self):
+        results = {}
+        barrier = threading.Barrier(4)
+
+        def load(upload_id: int) -> None:
+            with global_scope(I2B2Core, upload_id=upload_id):
+                barrier.wait()
+                x = ObservationFact()
+                x.concept_cd = f"C{upload_id}"
+                results[upload_id] = {(x.upload_id, row(x)) for _ in range(5000)}
+
+        threads = [threading.Thread(target=load, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual({n: {(n, f'C{n}\tUnspecified\t{n}\tUnspecified-date')} for n in range(4)}, results)
+        self.assertIsNone(I2B2Core.upload_id)
+
+    def test_tasks(self):
+        async def load(upload_id: int) -> list:
+            with global_scope(I2B2Core, upload_id=upload_id):
+                rval = []
+                for _ in range(5):
+                    rval.append(ObservationFact().upload_id)
+                    await asyncio.sleep(0)
+                return rval
+
+        async def main() -> list:
+            return await asyncio.gather(*[load(n) for n in range(3)])
+
+        self.assertEqual([[0] * 5, [1] * 5, [2] * 5], asyncio.run(main()))
+
+    def test_copied_context(self):
+        with global_scope(I2B2Core, upload_id=7):
+            ctx = contextvars.copy_context()
+        self.assertIsNone(I2B2Core.upload_id)
+        self.assertEqual(7, ctx.run(lambda: I2B2Core.upload_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import threading
+import unittest
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, row, reset, InstancePool
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[Optional[str]]
+    modifier_cd: Local[str] = "@"
+    tval_char: Local[Optional[str]]
+    _: Parent
+
+    def __init__(self, concept_cd: Optional[str]=None) -> None:
+        self.concept_cd = concept_cd
+        self.note = "constructed"
+
+
+class PoolTestCase(unittest.TestCase):
+    def tearDown(self):
+        clear(I2B2Core)
+        clear(ObservationFact)
+
+    def test_reset(self):
+        x = ObservationFact("LOINC:1")
+        x.modifier_cd = "MOD"
+        x.tval_char = "text"
+        self.assertEqual("LOINC:1\tMOD\ttext\tUnspecified", row(x))
+        ObservationFact.concept_cd = "DEFAULT"
+        reset(x)
+        self.assertEqual("DEFAULT\t@\t\tUnspecified", row(x))
+        self.assertEqual("constructed", x.note)
+
+    def test_borrow(self):
+        pool = InstancePool(ObservationFact)
+        with pool.borrow() as x:
+            self.assertTrue(isinstance(x, ObservationFact))
+            x.concept_cd = "LOINC:1"
+            x.tval_char = lambda: "computed"
+            self.assertEqual("LOINC:1\t@\tcomputed\tUnspecified", row(x))
+        with pool.borrow() as y:
+            self.assertIs(x, y)
+            self.assertEqual("\t@\t\tUnspecified", row(y))
+            y.modifier_cd = "MOD"
+            with pool.borrow() as z:
+                self.assertIsNot(y, z)
+                self.assertEqual("\t@\t\tUnspecified", row(z))
+        self.assertEqual(2, pool.created)
+        with self.assertRaises(RuntimeError):
+            with pool.borrow() as x:
+                x.concept_cd = "LOINC:2"
+                raise RuntimeError("Failed")
+        with pool.borrow() as x:
+            self.assertIsNone(x.concept_cd)
+        self.assertEqual(2, pool.created)
+
+    def test_factory(self):
+        pool = InstancePool(ObservationFact, lambda: ObservationFact("INIT"), max_size=1)
+        x = pool.acquire()
+        y = pool.acquire()
+        self.assertEqual("INIT", x.concept_cd)
+        self.assertEqual("constructed", x.note)
+        x.concept_cd = "LOINC:1"
+        x.tval_char = "text"
+        pool.release(x)
+        pool.release(y)
+        z = pool.acquire()
+        self.assertIs(x, z)
+        self.assertEqual("INIT\t@\t\tUnspecified", row(z))
+        self.assertEqual(2, pool.created)
+
+        # Instances that are dropped take their initial state with them
+        del x, y, z
+        self.assertEqual({}, pool._initial)
+
+    def test_threads(self):
+        pool = InstancePool(ObservationFact)
+        errors = []
+
+        def work(n: int) -> None:
+            for i in range(200):
+                with pool.borrow() as x:
+                    if x.concept_cd is not None:
+                        errors.append(x.concept_cd)
+                    x.concept_cd = f"{n}:{i}"
+                    if x.concept_cd != f"{n}:{i}":
+                        errors.append(x.concept_cd)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual([], errors)
+        self.assertLessEqual(pool.created, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
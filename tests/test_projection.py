@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from collections import OrderedDict
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, heading, row, as_dict, as_tuple, as_tuples, \
+    iter_values, export, export_shards, route, sort_export, IndexedRows, checkpoint_suffix
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+reified = []
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str]
+    patient_num: Local[int]
+    observation_blob: Local[Optional[str]]
+    _: Parent
+
+    def __init__(self, n: int) -> None:
+        self.concept_cd = f"LOINC:{n % 3}"
+        self.patient_num = n
+        self.observation_blob = lambda: reified.append(n) or f"blob {n}"
+
+
+class PatientDimension(I2B2Core):
+    patient_num: Local[int]
+    _: Parent
+
+    def __init__(self, n: int) -> None:
+        self.patient_num = n
+
+
+def loinc_1(inst: DynProps) -> bool:
+    return inst.concept_cd == "LOINC:1"
+
+
+class ProjectionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'facts.tsv')
+        reified.clear()
+
+    def tearDown(self):
+        clear(I2B2Core)
+        self.tmpdir.cleanup()
+
+    def output(self, path: Optional[str]=None):
+        with open(path or self.path) as f:
+            return f.read().splitlines()
+
+    def test_projection(self):
+        x = ObservationFact(4)
+        cols = ['patient_num', 'concept_cd']
+        self.assertEqual('patient_num\tconcept_cd', heading(ObservationFact, cols))
+        self.assertEqual('4\tLOINC:1', row(x, cols))
+        self.assertEqual(OrderedDict([('patient_num', 4), ('concept_cd', 'LOINC:1')]), as_dict(x, cols))
+        self.assertEqual((4, 'LOINC:1'), as_tuple(x, cols))
+        self.assertEqual([4, 'LOINC:1'], list(iter_values(x, cols)))
+        self.assertEqual([], reified)
+        self.assertEqual('LOINC:1\t4\tblob 4\tUnspecified', row(x))
+        self.assertEqual([4], reified)
+        for f in (row, as_dict, as_tuple, iter_values):
+            with self.assertRaises(ValueError):
+                f(x, ['no_such_column'])
+        with self.assertRaises(ValueError):
+            heading(ObservationFact, ['no_such_column'])
+
+    def test_as_tuples(self):
+        self.assertEqual([(1, 'Unspecified'), (4, 'Unspecified')],
+                         list(as_tuples((ObservationFact(n) for n in range(6)), ['patient_num', 'sourcesystem_cd'],
+                                        loinc_1)))
+        self.assertEqual([], reified)
+
+    def test_export(self):
+        self.assertEqual(3, export(ObservationFact, (ObservationFact(n) for n in range(9)), self.path, index=True,
+                                   key='patient_num', columns=['patient_num', 'observation_blob'], where=loinc_1))
+        self.assertEqual([1, 4, 7], reified)
+        self.assertEqual(['patient_num\tobservation_blob', '1\tblob 1', '4\tblob 4', '7\tblob 7'], self.output())
+        with IndexedRows(ObservationFact, self.path, ['patient_num', 'observation_blob']) as rows:
+            self.assertEqual(3, len(rows))
+            self.assertEqual('blob 4', rows[1].observation_blob)
+            self.assertEqual('blob 7', rows.get('7')[0].observation_blob)
+        with self.assertRaises(ValueError):
+            export(ObservationFact, [], self.path, key='concept_cd', columns=['patient_num'])
+
+    def test_checkpoint(self):
+        def failing(n: int, fail_at: Optional[int]=None):
+            for i in range(n):
+                if i == fail_at:
+                    raise RuntimeError("Failed")
+                yield ObservationFact(i)
+
+        with self.assertRaises(RuntimeError):
+            export(ObservationFact, failing(30, 20), self.path, checkpoint_every=5, where=loinc_1,
+                   columns=['patient_num'])
+        self.assertTrue(os.path.exists(self.path + checkpoint_suffix))
+        partial = self.output()
+        for columns in (None, ['patient_num', 'concept_cd'], ['concept_cd']):
+            with self.assertRaises(ValueError):
+                export(ObservationFact, failing(30), self.path, where=loinc_1, columns=columns, resume=True)
+        self.assertEqual(partial, self.output())
+        self.assertEqual(10, export(ObservationFact, failing(30), self.path, checkpoint_every=5, where=loinc_1,
+                                    columns=['patient_num'], resume=True))
+        self.assertEqual(['patient_num'] + [str(n) for n in range(1, 30, 3)], self.output())
+
+    def test_shards(self):
+        shards = export_shards(ObservationFact, (ObservationFact(n) for n in range(30)), self.path, max_rows=4,
+                               columns=['patient_num'], where=loinc_1)
+        self.assertEqual([4, 4, 2], [s['rows'] for s in shards])
+        self.assertEqual(['patient_num', '1', '4', '7', '10'],
+                         self.output(os.path.join(self.tmpdir.name, shards[0]['path'])))
+        self.assertEqual([], reified)
+
+    def test_sort(self):
+        insts = [ObservationFact(n) for n in range(12)]
+        self.assertEqual(4, sort_export(ObservationFact, insts, self.path, order_by=['patient_num'], run_size=2,
+                                        columns=['observation_blob'], where=loinc_1))
+        self.assertEqual(['observation_blob', 'blob 1', 'blob 4', 'blob 7', 'blob 10'], self.output())
+        self.assertEqual([1, 4, 7, 10], reified)
+
+    def test_route(self):
+        def mixed():
+            for n in range(6):
+                yield ObservationFact(n)
+                yield PatientDimension(n)
+
+        counts = route(mixed(), self.tmpdir.name, columns={ObservationFact: ['concept_cd', 'patient_num']},
+                       where=lambda inst: inst.patient_num % 2 == 0)
+        self.assertEqual({ObservationFact: 3, PatientDimension: 3}, dict(counts))
+        self.assertEqual(['concept_cd\tpatient_num', 'LOINC:0\t0', 'LOINC:2\t2', 'LOINC:1\t4'],
+                         self.output(os.path.join(self.tmpdir.name, 'ObservationFact.tsv')))
+        self.assertEqual([heading(PatientDimension)] + [row(PatientDimension(n)) for n in (0, 2, 4)],
+                         self.output(os.path.join(self.tmpdir.name, 'PatientDimension.tsv')))
+        self.assertEqual([], reified)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, heading, row, route, StreamRouter
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+class ObservationFact(I2B2Core):
+    patient_num: Local[int]
+    concept_cd: Local[str]
+    _: Parent
+
+    def __init__(self, patient_num: int, concept_cd: str) -> None:
+        self.patient_num = patient_num
+        self.concept_cd = concept_cd
+
+
+class PatientDimension(I2B2Core):
+    patient_num: Local[int]
+    _: Parent
+
+    def __init__(self, patient_num: int) -> None:
+        self.patient_num = patient_num
+
+
+class VisitDimension(I2B2Core):
+    encounter_num: Local[int]
+    patient_num: Local[int]
+    _: Parent
+
+    def __init__(self, encounter_num: int, patient_num: int) -> None:
+        self.encounter_num = encounter_num
+        self.patient_num = patient_num
+
+
+def extract(npatients: int):
+    for p in range(npatients):
+        yield PatientDimension(p)
+        for e in range(2):
+            yield VisitDimension(p * 10 + e, p)
+            yield ObservationFact(p, f"LOINC:{e}")
+            yield ObservationFact(p, f"SCT:{e}")
+
+
+class RouterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        clear(I2B2Core)
+        self.tmpdir.cleanup()
+
+    def check_output(self, cls, npatients: int) -> None:
+        with open(os.path.join(self.tmpdir.name, cls.__name__ + '.tsv')) as f:
+            self.assertEqual([heading(cls)] + [row(x) for x in extract(npatients) if type(x) is cls],
+                             f.read().splitlines())
+
+    def test_route(self):
+        counts = route(extract(10), self.tmpdir.name, batch_size=7)
+        self.assertEqual({PatientDimension: 10, VisitDimension: 20, ObservationFact: 40}, dict(counts))
+        for cls in (PatientDimension, VisitDimension, ObservationFact):
+            self.check_output(cls, 10)
+
+    def test_bounded_pool(self):
+        with StreamRouter(self.tmpdir.name, max_open=1, batch_size=1) as router:
+            for x in extract(5):
+                router.write(x)
+                self.assertLessEqual(len(router._open), 1)
+        for cls in (PatientDimension, VisitDimension, ObservationFact):
+            self.check_output(cls, 5)
+
+    def test_lazy_open(self):
+        with StreamRouter(lambda cls: os.path.join(self.tmpdir.name, cls.__name__.lower() + '.txt')) as router:
+            router.write(PatientDimension(1))
+            self.assertEqual([], os.listdir(self.tmpdir.name))
+            router.flush()
+            self.assertEqual(['patientdimension.txt'], os.listdir(self.tmpdir.name))
+        with open(os.path.join(self.tmpdir.name, 'patientdimension.txt')) as f:
+            self.assertEqual(heading(PatientDimension) + '\n' + row(PatientDimension(1)) + '\n', f.read())
+        with self.assertRaises(ValueError):
+            StreamRouter(self.tmpdir.name, max_open=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
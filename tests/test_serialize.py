@@ -0,0 +1,122 @@
+import pickle
+import unittest
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, row, as_dict, dumps_batch, loads_batch, views
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str]
+    modifier_cd: Local[str] = "@"
+    nval_num: Local[Optional[float]]
+    _: Parent
+
+    def __init__(self, concept_cd: str, nval_num: Optional[float]=None, note: Optional[str]=None) -> None:
+        self.concept_cd = concept_cd
+        self.nval_num = nval_num
+        if note:
+            self.note = note
+
+
+class PatientDimension(I2B2Core):
+    patient_num: Local[int]
+
+    def __init__(self, patient_num: int) -> None:
+        self.patient_num = patient_num
+
+
+class SerializeTestCase(unittest.TestCase):
+    def tearDown(self):
+        clear(I2B2Core)
+        ObservationFact._schema_version = None
+        ObservationFact._pickle_reified = False
+
+    def test_pickle(self):
+        x = ObservationFact("LOINC:1", 3.5, note="hello")
+        y = pickle.loads(pickle.dumps(x))
+        self.assertTrue(isinstance(y, ObservationFact))
+        self.assertEqual(as_dict(x), as_dict(y))
+        self.assertEqual("hello", y.note)
+        # Unset Locals still follow the class
+        ObservationFact.modifier_cd = "MOD"
+        self.assertEqual("MOD", y.modifier_cd)
+        y.modifier_cd = "INST"
+        self.assertEqual("INST", pickle.loads(pickle.dumps(y)).modifier_cd)
+        # None is a legitimate value
+        y.modifier_cd = None
+        self.assertIsNone(pickle.loads(pickle.dumps(y)).modifier_cd)
+
+    def test_compact(self):
+        x = ObservationFact("LOINC:1", 3.5)
+        self.assertLess(len(pickle.dumps(x)), len(pickle.dumps((ObservationFact, x.__dict__))))
+
+    def test_callables(self):
+        x = ObservationFact("LOINC:1")
+        x.nval_num = lambda: 17.0
+        with self.assertRaises((pickle.PicklingError, AttributeError)):
+            pickle.dumps(x)
+        ObservationFact._pickle_reified = True
+        y = pickle.loads(pickle.dumps(x))
+        self.assertEqual(17.0, y.nval_num)
+        self.assertEqual(17.0, y.nval_num_)
+
+    def test_schema_version(self):
+        data = pickle.dumps(ObservationFact("LOINC:1"))
+        ObservationFact._schema_version = 1
+        with self.assertRaises(ValueError):
+            pickle.loads(data)
+        data = pickle.dumps(ObservationFact("LOINC:1"))
+        self.assertEqual("LOINC:1", pickle.loads(data).concept_cd)
+        ObservationFact._schema_version = None
+        with self.assertRaises(ValueError):
+            pickle.loads(data)
+
+    def test_schema_fingerprint(self):
+        class Fact(DynProps):
+            concept_cd: Local[str]
+            modifier_cd: Local[str]
+
+        class ReorderedFact(DynProps):
+            modifier_cd: Local[str]
+            concept_cd: Local[str]
+
+        class ExtendedFact(Fact):
+            _: Parent
+            nval_num: Local[float]
+
+        x = Fact()
+        x.concept_cd = "LOINC:1"
+        for cls in (ReorderedFact, ExtendedFact):
+            with self.assertRaises(ValueError):
+                cls.__new__(cls).__setstate__(x.__getstate__())
+        y = Fact.__new__(Fact)
+        y.__setstate__(x.__getstate__())
+        self.assertEqual("LOINC:1", y.concept_cd)
+
+    def test_batch(self):
+        insts = [ObservationFact("LOINC:1", 1.0), PatientDimension(42), ObservationFact("LOINC:2", note="n")]
+        insts[1].patient_num = lambda: 43
+        with self.assertRaises((pickle.PicklingError, AttributeError)):
+            dumps_batch(insts)
+        data = dumps_batch(insts, reify=True)
+        loaded = loads_batch(data)
+        self.assertEqual([type(x) for x in insts], [type(x) for x in loaded])
+        self.assertEqual([row(x) for x in insts], [row(x) for x in loaded])
+        self.assertEqual("n", loaded[2].note)
+        self.assertLess(len(data), sum(len(pickle.dumps(x)) for x in loaded))
+
+    def test_batch_of_views(self):
+        records = [("LOINC:1", 1.5), ("LOINC:2", None), ("LOINC:3", 3.0)]
+        expected = [row(x) for x in views(ObservationFact, records, dict(concept_cd=0, nval_num=1))]
+        loaded = loads_batch(dumps_batch(views(ObservationFact, records, dict(concept_cd=0, nval_num=1))))
+        self.assertEqual([ObservationFact] * 3, [type(x) for x in loaded])
+        self.assertEqual(expected, [row(x) for x in loaded])
+        self.assertEqual(['_concept_cd', '_nval_num'], sorted(loaded[0].__dict__))
+
+
+if __name__ == '__main__':
+    unittest.main()
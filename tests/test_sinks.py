@@ -0,0 +1,97 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import tempfile
+import unittest
+
+from dynprops import DynProps, Global, Local, clear, heading, row, export, export_shards, ShardedSink
+
+
+class Fact(DynProps):
+    upload_id: Global[int]
+    concept_cd: Local[str]
+    nval_num: Local[int]
+
+    def __init__(self, n: int) -> None:
+        self.concept_cd = f"LOINC:{n}"
+        self.nval_num = n
+
+
+class ShardedSinkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'facts.tsv')
+        Fact.upload_id = 42
+
+    def tearDown(self):
+        clear(Fact)
+        self.tmpdir.cleanup()
+
+    def read_shards(self, opener=open):
+        with open(os.path.join(self.tmpdir.name, 'facts.manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertEqual(heading(Fact), manifest['heading'])
+        rows = []
+        for shard in manifest['shards']:
+            with opener(os.path.join(self.tmpdir.name, shard['path']), 'rt') as f:
+                lines = f.read().splitlines()
+            self.assertEqual(heading(Fact), lines[0])
+            self.assertEqual(shard['rows'], len(lines) - 1)
+            rows += lines[1:]
+        self.assertEqual(manifest['rows'], len(rows))
+        return manifest, rows
+
+    def test_rotate_by_rows(self):
+        shards = export_shards(Fact, (Fact(n) for n in range(25)), self.path, max_rows=10)
+        self.assertEqual(['facts.00000.tsv', 'facts.00001.tsv', 'facts.00002.tsv'], [s['path'] for s in shards])
+        self.assertEqual([10, 10, 5], [s['rows'] for s in shards])
+        manifest, rows = self.read_shards()
+        self.assertEqual(shards, manifest['shards'])
+        self.assertEqual([row(Fact(n)) for n in range(25)], rows)
+
+    def test_rotate_by_bytes(self):
+        line_len = len(row(Fact(10))) + 1
+        shards = export_shards(Fact, (Fact(n) for n in range(10, 40)), self.path,
+                               max_bytes=len(heading(Fact)) + 1 + 4 * line_len)
+        self.assertEqual([4] * 7 + [2], [s['rows'] for s in shards])
+        _, rows = self.read_shards()
+        self.assertEqual([row(Fact(n)) for n in range(10, 40)], rows)
+
+    def test_failed_export(self):
+        def failing():
+            for n in range(25):
+                if n == 15:
+                    raise RuntimeError("Extraction failed")
+                yield Fact(n)
+        with self.assertRaises(RuntimeError):
+            export_shards(Fact, failing(), self.path, max_rows=10, stats=True)
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, 'facts.manifest.json')))
+        with open(os.path.join(self.tmpdir.name, 'facts.00001.tsv')) as f:
+            self.assertEqual(6, len(f.read().splitlines()))
+
+    def test_compression(self):
+        for compression, opener in (('gzip', gzip.open), ('bz2', bz2.open), ('lzma', lzma.open)):
+            for background in (False, True):
+                shards = export_shards(Fact, (Fact(n) for n in range(1000)), self.path, max_rows=300,
+                                       compression=compression, background=background)
+                self.assertEqual(4, len(shards))
+                manifest, rows = self.read_shards(opener)
+                self.assertEqual(compression, manifest['compression'])
+                self.assertEqual([row(Fact(n)) for n in range(1000)], rows)
+
+        with self.assertRaises(ValueError):
+            ShardedSink(Fact, self.path, compression='zip')
+
+    def test_single_compressed_file(self):
+        self.assertEqual(3, export(Fact, (Fact(n) for n in range(3)), self.path + '.gz', compression='gzip',
+                                   background=True))
+        with gzip.open(self.path + '.gz', 'rt') as f:
+            self.assertEqual([heading(Fact)] + [row(Fact(n)) for n in range(3)], f.read().splitlines())
+        with self.assertRaises(ValueError):
+            export(Fact, [], self.path, index=True, compression='gzip')
+
+
+if __name__ == '__main__':
+    unittest.main()
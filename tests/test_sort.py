@@ -0,0 +1,138 @@
+import gzip
+import os
+import random
+import tempfile
+import unittest
+from typing import Optional
+from unittest import mock
+
+from dynprops import _sort
+from dynprops import DynProps, Global, Local, Parent, clear, heading, row, sort_export
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str]
+    patient_num: Local[int]
+    nval_num: Local[Optional[int]]
+    _: Parent
+
+    def __init__(self, concept_cd: str, patient_num: int, nval_num: Optional[int]) -> None:
+        self.concept_cd = concept_cd
+        self.patient_num = patient_num
+        self.nval_num = nval_num
+
+
+def facts(n: int, seed: int=42):
+    rnd = random.Random(seed)
+    return [ObservationFact(f"LOINC:{rnd.randint(1, 20)}", rnd.randint(1, 200),
+                            rnd.choice([None, rnd.randint(-50, 50)])) for _ in range(n)]
+
+
+class SortExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'facts.tsv')
+
+    def tearDown(self):
+        clear(I2B2Core)
+        self.tmpdir.cleanup()
+
+    def output(self, opener=open):
+        with opener(self.path, 'rt') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(heading(ObservationFact), lines[0])
+        return lines[1:]
+
+    def test_default_order(self):
+        insts = facts(500)
+        for run_size in (1000, 500, 64, 1):
+            self.assertEqual(500, sort_export(ObservationFact, iter(insts), self.path, run_size=run_size))
+            self.assertEqual([row(x) for x in sorted(insts)], self.output())
+
+    def test_columns(self):
+        insts = facts(500)
+
+        def expected_key(x: ObservationFact):
+            return (x.nval_num is not None, x.nval_num), (True, x.patient_num), row(x)
+
+        expected = [row(x) for x in sorted(insts, key=expected_key)]
+        for run_size in (1000, 37):
+            sort_export(ObservationFact, insts, self.path, ['nval_num', 'patient_num'], run_size=run_size,
+                        tmpdir=self.tmpdir.name)
+            self.assertEqual(expected, self.output())
+        self.assertEqual(['facts.tsv'], os.listdir(self.tmpdir.name))
+
+        with self.assertRaises(ValueError):
+            sort_export(ObservationFact, insts, self.path, ['no_such_column'])
+        with self.assertRaises(ValueError):
+            sort_export(ObservationFact, insts, self.path, run_size=0)
+
+    def test_fan_in(self):
+        insts = facts(500)
+        read_run = _sort._read_run
+        open_runs = []
+        max_open = []
+
+        def counted_read_run(path):
+            open_runs.append(path)
+            max_open.append(len(open_runs))
+            yield from read_run(path)
+            open_runs.remove(path)
+
+        with mock.patch.object(_sort, '_read_run', counted_read_run):
+            for max_fan_in in (2, 3, 16):
+                max_open.clear()
+                sort_export(ObservationFact, insts, self.path, ['patient_num'], run_size=7, tmpdir=self.tmpdir.name,
+                            max_fan_in=max_fan_in)
+                self.assertEqual(max_fan_in, max(max_open))
+                self.assertEqual([row(x) for x in sorted(insts, key=lambda x: (x.patient_num, row(x)))],
+                                 self.output())
+                self.assertEqual(['facts.tsv'], os.listdir(self.tmpdir.name))
+        with self.assertRaises(ValueError):
+            sort_export(ObservationFact, insts, self.path, max_fan_in=1)
+
+    def test_mixed_types(self):
+        class MixedFact(I2B2Core):
+            code: Local[object]
+            _: Parent
+
+            def __init__(self, code: object) -> None:
+                self.code = code
+
+        codes = ['b', 3, None, 'a', 1.5, 2, None, 'c']
+        for run_size in (100, 2):
+            self.assertEqual(8, sort_export(MixedFact, [MixedFact(c) for c in codes], self.path, ['code'],
+                                            run_size=run_size))
+            with open(self.path) as f:
+                self.assertEqual([heading(MixedFact), '\tUnspecified', '\tUnspecified'] +
+                                 [f'{c}\tUnspecified' for c in (1.5, 2, 3, 'a', 'b', 'c')], f.read().splitlines())
+
+    def test_reified_once(self):
+        calls = []
+
+        class Counted(I2B2Core):
+            key: Local[int]
+
+            def __init__(self, n: int) -> None:
+                self.key = lambda: calls.append(n) or -n
+
+        sort_export(Counted, [Counted(n) for n in range(10)], self.path, ['key'], run_size=3)
+        self.assertEqual(list(range(10)), calls)
+        with open(self.path) as f:
+            self.assertEqual(['Unspecified\t' + str(-n) for n in range(9, -1, -1)], f.read().splitlines()[1:])
+
+    def test_compressed(self):
+        insts = facts(100)
+        sort_export(ObservationFact, insts, self.path, ['concept_cd'], run_size=10, compression='gzip')
+        self.assertEqual(sorted(row(x) for x in insts),
+                         sorted(self.output(gzip.open)))
+        self.assertEqual(sorted(x.concept_cd for x in insts),
+                         [line.split('\t')[0] for line in self.output(gzip.open)])
+
+
+if __name__ == '__main__':
+    unittest.main()
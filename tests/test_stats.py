@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, export, export_shards, route, ColumnStats, \
+    HyperLogLog, stats_suffix
+
+
+class I2B2Core(DynProps):
+    update_date: Global[datetime]
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str]
+    nval_num: Local[Optional[int]]
+    tval_char: Local[Optional[str]]
+    _: Parent
+
+    def __init__(self, n: int) -> None:
+        self.concept_cd = f"LOINC:{n % 50}"
+        self.nval_num = n if n % 4 else None
+        self.tval_char = "x" * (n % 30) if n % 3 else None
+
+
+class PatientDimension(I2B2Core):
+    patient_num: Local[int]
+
+    def __init__(self, n: int) -> None:
+        self.patient_num = n
+
+
+class ColumnStatsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        I2B2Core.update_date = datetime(2017, 5, 29)
+
+    def tearDown(self):
+        clear(I2B2Core)
+        self.tmpdir.cleanup()
+
+    def test_hyperloglog(self):
+        for n in (0, 10, 1000, 50000):
+            hll = HyperLogLog()
+            for i in range(n):
+                hll.add(str(i))
+                hll.add(str(i))
+            self.assertAlmostEqual(n, hll.estimate(), delta=max(1, n * 0.05))
+        with self.assertRaises(ValueError):
+            HyperLogLog(20)
+
+    def test_collector(self):
+        stats = ColumnStats(ObservationFact)
+        for n in range(1000):
+            stats.add_instance(ObservationFact(n))
+        report = stats.report()
+        self.assertEqual('ObservationFact', report['class'])
+        self.assertEqual(1000, report['rows'])
+        columns = report['columns']
+        self.assertEqual(['concept_cd', 'nval_num', 'tval_char', 'update_date'], list(columns))
+        self.assertEqual(dict(nulls=0, min='LOINC:0', max='LOINC:9', max_length=8, distinct=50),
+                         columns['concept_cd'])
+        self.assertEqual(dict(nulls=250, min='1', max='999', max_length=3), {k: v for k, v in
+                                                                              columns['nval_num'].items()
+                                                                              if k != 'distinct'})
+        self.assertAlmostEqual(750, columns['nval_num']['distinct'], delta=40)
+        self.assertEqual(334, columns['tval_char']['nulls'])
+        self.assertEqual(29, columns['tval_char']['max_length'])
+        self.assertEqual(dict(nulls=0, min='2017-05-29 00:00:00', max='2017-05-29 00:00:00', max_length=19,
+                              distinct=1), columns['update_date'])
+
+    def test_uncomparable(self):
+        stats = ColumnStats(PatientDimension)
+        stats.add((None, 1))
+        stats.add((None, 'a'))
+        self.assertEqual(dict(nulls=0, min=None, max=None, max_length=1, distinct=2),
+                         stats.report()['columns']['patient_num'])
+        self.assertEqual(dict(nulls=2, min=None, max=None, max_length=0, distinct=0),
+                         stats.report()['columns']['update_date'])
+
+    def test_export(self):
+        path = os.path.join(self.tmpdir.name, 'facts.tsv')
+        export(ObservationFact, (ObservationFact(n) for n in range(100)), path, stats=True)
+        with open(path + stats_suffix) as f:
+            self.assertEqual(100, json.load(f)['rows'])
+
+        export_shards(ObservationFact, (ObservationFact(n) for n in range(100)), path, max_rows=30, stats=True)
+        with open(path + stats_suffix) as f:
+            report = json.load(f)
+        self.assertEqual(100, report['rows'])
+        self.assertEqual('99', report['columns']['nval_num']['max'])
+
+    def test_route(self):
+        def mixed():
+            for n in range(20):
+                yield ObservationFact(n)
+                if n % 2:
+                    yield PatientDimension(n)
+
+        route(mixed(), self.tmpdir.name, stats=True)
+        for cls, nrows in ((ObservationFact, 20), (PatientDimension, 10)):
+            with open(os.path.join(self.tmpdir.name, cls.__name__ + '.tsv' + stats_suffix)) as f:
+                report = json.load(f)
+            self.assertEqual(cls.__name__, report['class'])
+            self.assertEqual(nrows, report['rows'])
+
+
+if __name__ == '__main__':
+    unittest.main()
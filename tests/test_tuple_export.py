@@ -0,0 +1,80 @@
+import tracemalloc
+import unittest
+from datetime import datetime
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, as_dict, as_tuple, as_record, as_records, \
+    as_tuples, iter_values, record_type, row
+
+
+class I2B2Core(DynProps):
+    update_date: Global[datetime]
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+class ObservationFact(I2B2Core):
+    concept_cd: Local[str]
+    modifier_cd: Local[str] = "@"
+    _: Parent
+
+    def __init__(self, concept_cd: str) -> None:
+        self.concept_cd = concept_cd
+
+
+class Reified:
+    def reify(self):
+        return "reified"
+
+
+class TupleExportTestCase(unittest.TestCase):
+    def setUp(self):
+        I2B2Core.update_date = datetime(2017, 5, 29)
+
+    def tearDown(self):
+        clear(I2B2Core)
+
+    def test_tuple(self):
+        x = ObservationFact("LOINC:1")
+        self.assertEqual(tuple(as_dict(x).values()), as_tuple(x))
+        self.assertEqual(('LOINC:1', '@', datetime(2017, 5, 29), 'Unspecified'), as_tuple(x))
+        self.assertEqual(list(as_tuple(x)), list(iter_values(x)))
+        x.modifier_cd = Reified()
+        self.assertEqual(('LOINC:1', 'reified', datetime(2017, 5, 29), 'Unspecified'), as_tuple(x))
+        self.assertEqual('LOINC:1\treified\t2017-05-29 00:00:00\tUnspecified', row(x))
+
+    def test_record(self):
+        rt = record_type(ObservationFact)
+        self.assertIs(rt, record_type(ObservationFact))
+        self.assertEqual(('concept_cd', 'modifier_cd', 'update_date', 'sourcesystem_cd'), rt._fields)
+        self.assertEqual(('update_date', 'sourcesystem_cd'), record_type(I2B2Core)._fields)
+        r = as_record(ObservationFact("LOINC:2"))
+        self.assertTrue(isinstance(r, rt))
+        self.assertEqual("LOINC:2", r.concept_cd)
+        self.assertEqual("Unspecified", r.sourcesystem_cd)
+        self.assertEqual(as_dict(ObservationFact("LOINC:2")), r._asdict())
+
+    def test_bulk(self):
+        insts = [ObservationFact(f"LOINC:{n}") for n in range(3)]
+        self.assertEqual([as_tuple(x) for x in insts], list(as_tuples(insts)))
+        records = list(as_records(ObservationFact, insts))
+        self.assertEqual(["LOINC:0", "LOINC:1", "LOINC:2"], [r.concept_cd for r in records])
+
+    def test_allocations(self):
+        """ Tuples and records take less memory than frozen OrderedDicts """
+        insts = [ObservationFact(f"LOINC:{n}") for n in range(1000)]
+
+        def allocated(f) -> int:
+            tracemalloc.start()
+            try:
+                _ = [f(x) for x in insts]
+                return tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+
+        freeze_size = allocated(as_dict)
+        self.assertLess(allocated(as_tuple) * 2, freeze_size)
+        self.assertLess(allocated(as_record) * 2, freeze_size)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import pickle
+import tempfile
+import unittest
+from collections import OrderedDict
+from itertools import chain
+from typing import Optional
+
+from dynprops import DynProps, Global, Local, Parent, clear, heading, row, as_dict, as_record, record_type, \
+    record_view, bind, views, route, view_cache_size
+
+
+class I2B2Core(DynProps):
+    sourcesystem_cd: Global[Optional[str]] = "Unspecified"
+
+
+class PatientDimension(I2B2Core):
+    patient_num: Local[int]
+    sex_cd: Local[Optional[str]]
+    birth_date: Local[Optional[str]]
+    vital_status_cd: Local[str] = "N"
+    _: Parent
+
+    _record_fields = dict(patient_num=0, sex_cd=1, birth_date=lambda r: r[2][:4] if r[2] else None)
+
+    def __init__(self, patient_num: int, sex_cd: Optional[str], birth_date: Optional[str]) -> None:
+        self.patient_num = patient_num
+        self.sex_cd = sex_cd
+        self.birth_date = birth_date[:4] if birth_date else None
+
+
+class ComputedDimension(PatientDimension):
+    _: Parent
+    unknown_birth_cd: Local[str]
+
+    def unknown_birth_cd(self) -> str:
+        return "Y" if self.birth_date is None else "N"
+
+
+cursor = [(1001, 'M', '1960-04-02'), (1002, 'F', None), (1003, None, '2001-12-31')]
+
+
+class RecordViewTestCase(unittest.TestCase):
+    def tearDown(self):
+        clear(I2B2Core)
+
+    def test_declared_fields(self):
+        view = record_view(PatientDimension)
+        self.assertTrue(isinstance(view, PatientDimension))
+        for record in cursor:
+            self.assertIs(view, bind(view, record))
+            expected = PatientDimension(*record)
+            self.assertEqual(row(expected), row(view))
+            self.assertEqual(as_dict(expected), as_dict(view))
+            self.assertEqual(str(expected), str(view))
+        I2B2Core.sourcesystem_cd = "FHIR"
+        self.assertEqual('1003\t\t2001\tN\tFHIR', row(view))
+
+    def test_views(self):
+        records = [dict(id=1, gender='male'), dict(id=2, gender=None)]
+        rows = [row(v) for v in views(PatientDimension, records, dict(patient_num='id', sex_cd='gender'))]
+        self.assertEqual(['1\tmale\t\tN\tUnspecified', '2\t\t\tN\tUnspecified'], rows)
+        self.assertEqual(1, len({id(v) for v in views(PatientDimension, records, dict(patient_num='id'))}))
+
+    def test_computed_locals(self):
+        self.assertEqual(['1001\tM\t1960\tN\tUnspecified\tN', '1002\tF\t\tN\tUnspecified\tY'],
+                         [row(v) for v in views(ComputedDimension, cursor[:2])])
+        self.assertEqual(OrderedDict([('patient_num', 1003), ('sex_cd', None), ('birth_date', '2001'),
+                                      ('vital_status_cd', 'N'), ('sourcesystem_cd', 'Unspecified'),
+                                      ('unknown_birth_cd', 'N')]),
+                         as_dict(bind(record_view(ComputedDimension), cursor[2])))
+
+    def test_view_class(self):
+        view = record_view(PatientDimension)
+        self.assertIs(PatientDimension, type(record_view(PatientDimension))._view_of)
+        self.assertIs(PatientDimension, type(view)._view_of)
+        self.assertIsNot(type(view), type(record_view(PatientDimension, dict(patient_num=0))))
+        self.assertIs(record_type(PatientDimension), type(as_record(bind(view, cursor[0]))))
+
+        # Field maps built per call don't accumulate view classes
+        for _ in range(3 * view_cache_size):
+            self.assertEqual(['1002'], [row(v).split('\t')[0] for v in
+                                        views(PatientDimension, [cursor[1]], dict(patient_num=lambda r: r[0]))])
+        self.assertEqual(view_cache_size, len(PatientDimension._view_classes))
+        self.assertIs(PatientDimension, type(record_view(PatientDimension))._view_of)
+
+    def test_pickle(self):
+        view = bind(record_view(PatientDimension), cursor[0])
+        view.vital_status_cd = "Y"
+        x = pickle.loads(pickle.dumps(view))
+        self.assertIs(PatientDimension, type(x))
+        self.assertEqual('1001\tM\t1960\tY\tUnspecified', row(x))
+        bind(view, cursor[1])
+        self.assertEqual('1001\tM\t1960\tY\tUnspecified', row(x))
+
+    def test_route(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            counts = route(chain([PatientDimension(1000, 'F', None)], views(PatientDimension, cursor),
+                                 [PatientDimension(1004, 'M', None)]), tmpdir,
+                           columns={PatientDimension: ['patient_num', 'birth_date']})
+            self.assertEqual({PatientDimension: 5}, dict(counts))
+            with open(os.path.join(tmpdir, 'PatientDimension.tsv')) as f:
+                self.assertEqual(['patient_num\tbirth_date', '1000\t', '1001\t1960', '1002\t', '1003\t2001',
+                                  '1004\t'], f.read().splitlines())
+
+    def test_bad_fields(self):
+        with self.assertRaises(ValueError):
+            record_view(I2B2Core)
+        with self.assertRaises(ValueError):
+            record_view(PatientDimension, dict(sourcesystem_cd=0))
+        with self.assertRaises(ValueError):
+            record_view(PatientDimension, dict(not_a_prop=0))
+
+
+if __name__ == '__main__':
+    unittest.main()